@@ -4,24 +4,81 @@ Initializes Flask app with all extensions and blueprints.
 """
 
 from flask import Flask
-from flask_pymongo import PyMongo
-from flask_jwt_extended import JWTManager
-from flask_bcrypt import Bcrypt
-from flask_cors import CORS
-from flask_socketio import SocketIO
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+import importlib
 import os
 
-# Initialize extensions
-mongo = PyMongo()
-jwt = JWTManager()
-bcrypt = Bcrypt()
-socketio = SocketIO(cors_allowed_origins="*", async_mode='eventlet')
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
-)
+# Extension singletons are created on first access so that entry points
+# only import the libraries they actually use (e.g. CLI commands never
+# pull in SocketIO). ``from app import mongo`` still works via
+# the module-level ``__getattr__`` below.
+_extensions = {}
+
+
+def get_mongo():
+    """
+    Return the shared PyMongo extension, creating it on first use.
+
+    Its MongoClient is created once per app in create_app() and pools
+    connections for the whole process; models reach it through
+    ``mongo.db`` and must never construct a MongoClient of their own.
+    """
+    if 'mongo' not in _extensions:
+        from flask_pymongo import PyMongo
+        _extensions['mongo'] = PyMongo()
+    return _extensions['mongo']
+
+
+def get_jwt():
+    """Return the shared JWTManager extension, creating it on first use."""
+    if 'jwt' not in _extensions:
+        from flask_jwt_extended import JWTManager
+        _extensions['jwt'] = JWTManager()
+    return _extensions['jwt']
+
+
+def get_bcrypt():
+    """Return the shared Bcrypt extension, creating it on first use."""
+    if 'bcrypt' not in _extensions:
+        from flask_bcrypt import Bcrypt
+        _extensions['bcrypt'] = Bcrypt()
+    return _extensions['bcrypt']
+
+
+def get_socketio():
+    """Return the shared SocketIO extension, creating it on first use."""
+    if 'socketio' not in _extensions:
+        from flask_socketio import SocketIO
+        _extensions['socketio'] = SocketIO(cors_allowed_origins="*")
+    return _extensions['socketio']
+
+
+def get_limiter():
+    """Return the shared Limiter extension, creating it on first use."""
+    if 'limiter' not in _extensions:
+        from flask_limiter import Limiter
+        from flask_limiter.util import get_remote_address
+        _extensions['limiter'] = Limiter(
+            key_func=get_remote_address,
+            default_limits=["200 per day", "50 per hour"]
+        )
+    return _extensions['limiter']
+
+
+_EXTENSION_GETTERS = {
+    'mongo': get_mongo,
+    'jwt': get_jwt,
+    'bcrypt': get_bcrypt,
+    'socketio': get_socketio,
+    'limiter': get_limiter,
+}
+
+
+def __getattr__(name):
+    """Lazily resolve extension singletons (PEP 562)."""
+    getter = _EXTENSION_GETTERS.get(name)
+    if getter is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getter()
 
 
 def create_app(config_class):
@@ -35,39 +92,70 @@ def create_app(config_class):
     Returns:
         Flask application instance
     """
+    from app.utils.json_provider import OrjsonProvider
+
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = OrjsonProvider(app)
     
     # Initialize extensions with app
-    mongo.init_app(app)
-    jwt.init_app(app)
-    bcrypt.init_app(app)
-    CORS(app, origins=app.config['CORS_ORIGINS'])
-
-    # Initialize SocketIO (without message queue for development)
-    message_queue = app.config.get('SOCKETIO_MESSAGE_QUEUE')
-    if message_queue:
-        socketio.init_app(app, message_queue=message_queue)
-    else:
-        socketio.init_app(app)
-
-    limiter.init_app(app)
+    get_mongo().init_app(
+        app,
+        maxPoolSize=app.config.get('MONGO_MAX_POOL_SIZE', 10),
+        minPoolSize=app.config.get('MONGO_MIN_POOL_SIZE', 2),
+        maxIdleTimeMS=app.config.get('MONGO_MAX_IDLE_TIME_MS', 30000),
+        waitQueueTimeoutMS=app.config.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2500)
+    )
+    load_jwt_keys(app)
+    get_jwt().init_app(app)
+    get_bcrypt().init_app(app)
+
+    # CLI-only processes (init-db, create-admin, ...) never serve requests,
+    # so skip CORS, sockets, rate limiting and the route modules entirely
+    cli_minimal = app.config.get('CLI_MINIMAL', False)
+
+    if not cli_minimal:
+        from flask_cors import CORS
+        CORS(app, origins=app.config['CORS_ORIGINS'])
+
+        # Initialize SocketIO (without message queue for development).
+        # The async mode comes from config so plain threads can be used
+        # instead of eventlet's monkey-patched sockets.
+        socketio = get_socketio()
+        async_mode = app.config.get('SOCKETIO_ASYNC_MODE', 'threading')
+        message_queue = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+        if message_queue:
+            socketio.init_app(app, async_mode=async_mode, message_queue=message_queue)
+        else:
+            socketio.init_app(app, async_mode=async_mode)
+
+        get_limiter().init_app(app)
+
+        # Write buffered audit log entries off the request path
+        from app.models.audit_log import AuditLog
+        socketio.start_background_task(AuditLog.run_flusher, socketio.sleep)
     
     # Create upload folder if it doesn't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     os.makedirs(app.config['AI_MODEL_PATH'], exist_ok=True)
     
     # Register blueprints
-    register_blueprints(app)
+    if not cli_minimal:
+        register_blueprints(app)
     
     # Register error handlers
     register_error_handlers(app)
     
     # Register JWT handlers
     register_jwt_handlers(app)
+
+    # Send writes queued with queue_write() once the request is done
+    from app.utils.db import flush_writes
+    app.teardown_request(flush_writes)
     
     # Register SocketIO events
-    register_socketio_events(app)
+    if not cli_minimal:
+        register_socketio_events(app)
     
     # Register CLI commands
     register_cli_commands(app)
@@ -75,32 +163,32 @@ def create_app(config_class):
     return app
 
 
+# Blueprint table: (module path, blueprint attribute, URL prefix)
+BLUEPRINTS = [
+    ('app.routes.views', 'views_bp', None),  # No prefix for root routes
+    ('app.routes.auth', 'auth_bp', '/api/auth'),
+    ('app.routes.customer', 'customer_bp', '/api/customer'),
+    ('app.routes.vendor', 'vendor_bp', '/api/vendor'),
+    ('app.routes.onboard_manager', 'onboard_manager_bp', '/api/onboard-manager'),
+    ('app.routes.ops_manager', 'ops_manager_bp', '/api/ops-manager'),
+    ('app.routes.super_admin', 'super_admin_bp', '/api/super_admin'),
+    ('app.routes.common', 'common_bp', '/api'),
+    ('app.routes.chatbot', 'chatbot_bp', '/api/chatbot'),
+    ('app.routes.signature', 'signature_bp', '/api/signature'),
+]
+
+
 def register_blueprints(app):
     """Register all application blueprints."""
-    
-    # Import blueprints
-    from app.routes.views import views_bp
-    from app.routes.auth import auth_bp
-    from app.routes.customer import customer_bp
-    from app.routes.vendor import vendor_bp
-    from app.routes.onboard_manager import onboard_manager_bp
-    from app.routes.ops_manager import ops_manager_bp
-    from app.routes.super_admin import super_admin_bp
-    from app.routes.common import common_bp
-    from app.routes.chatbot import chatbot_bp
-    from app.routes.signature import signature_bp
-
-    # Register blueprints with URL prefixes
-    app.register_blueprint(views_bp)  # No prefix for root routes
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(customer_bp, url_prefix='/api/customer')
-    app.register_blueprint(vendor_bp, url_prefix='/api/vendor')
-    app.register_blueprint(onboard_manager_bp, url_prefix='/api/onboard-manager')
-    app.register_blueprint(ops_manager_bp, url_prefix='/api/ops-manager')
-    app.register_blueprint(super_admin_bp, url_prefix='/api/super_admin')
-    app.register_blueprint(common_bp, url_prefix='/api')
-    app.register_blueprint(chatbot_bp, url_prefix='/api/chatbot')
-    app.register_blueprint(signature_bp, url_prefix='/api/signature')
+
+    for module_path, attr_name, url_prefix in BLUEPRINTS:
+        # Route modules are only imported here, never at package import time
+        module = importlib.import_module(module_path)
+        blueprint = getattr(module, attr_name)
+        if url_prefix:
+            app.register_blueprint(blueprint, url_prefix=url_prefix)
+        else:
+            app.register_blueprint(blueprint)
 
 
 def register_error_handlers(app):
@@ -121,6 +209,27 @@ def register_error_handlers(app):
     app.register_error_handler(500, handle_500_error)
 
 
+def load_jwt_keys(app):
+    """
+    Load the PEM key pair for asymmetric JWT algorithms (EdDSA, ES256, ...).
+
+    The keys are parsed once here and stored as key objects, so signing and
+    verifying tokens does not re-parse the PEM on every request. HMAC
+    algorithms (the HS256 default) use JWT_SECRET_KEY and need nothing.
+    """
+    private_path = app.config.get('JWT_PRIVATE_KEY_PATH')
+    public_path = app.config.get('JWT_PUBLIC_KEY_PATH')
+    if app.config.get('JWT_ALGORITHM', 'HS256').startswith('HS') or not (private_path and public_path):
+        return
+
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+    with open(private_path, 'rb') as f:
+        app.config['JWT_PRIVATE_KEY'] = load_pem_private_key(f.read(), password=None)
+    with open(public_path, 'rb') as f:
+        app.config['JWT_PUBLIC_KEY'] = load_pem_public_key(f.read())
+
+
 def register_jwt_handlers(app):
     """Register JWT callback handlers."""
 
@@ -132,26 +241,14 @@ def register_jwt_handlers(app):
         unauthorized_callback
     )
 
-    # Register JWT callbacks using decorators
-    @jwt.user_identity_loader
-    def _user_identity_loader(user):
-        return user_identity_lookup(user)
-
-    @jwt.user_lookup_loader
-    def _user_lookup_loader(_jwt_header, jwt_data):
-        return user_lookup_callback(_jwt_header, jwt_data)
-
-    @jwt.expired_token_loader
-    def _expired_token_loader(jwt_header, jwt_payload):
-        return expired_token_callback(jwt_header, jwt_payload)
-
-    @jwt.invalid_token_loader
-    def _invalid_token_loader(error):
-        return invalid_token_callback(error)
+    jwt = get_jwt()
 
-    @jwt.unauthorized_loader
-    def _unauthorized_loader(error):
-        return unauthorized_callback(error)
+    # Register the handler functions directly as JWT callbacks
+    jwt.user_identity_loader(user_identity_lookup)
+    jwt.user_lookup_loader(user_lookup_callback)
+    jwt.expired_token_loader(expired_token_callback)
+    jwt.invalid_token_loader(invalid_token_callback)
+    jwt.unauthorized_loader(unauthorized_callback)
 
 
 def register_socketio_events(app):
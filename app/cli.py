@@ -5,6 +5,7 @@ Database initialization, admin creation, and data seeding.
 
 import click
 from flask.cli import with_appcontext
+from pymongo.errors import OperationFailure
 from app.models.user import User
 from app.models.vendor import Vendor
 from app.models.service import Service
@@ -19,37 +20,31 @@ from app.models.notification import Notification
 @with_appcontext
 def init_db():
     """Initialize database with indexes."""
-    try:
-        click.echo('Creating database indexes...')
-        
-        User.create_indexes()
-        click.echo('✓ User indexes created')
-        
-        Vendor.create_indexes()
-        click.echo('✓ Vendor indexes created')
-        
-        Service.create_indexes()
-        click.echo('✓ Service indexes created')
-        
-        Booking.create_indexes()
-        click.echo('✓ Booking indexes created')
-        
-        Payment.create_indexes()
-        click.echo('✓ Payment indexes created')
-        
-        Signature.create_indexes()
-        click.echo('✓ Signature indexes created')
-        
-        AuditLog.create_indexes()
-        click.echo('✓ AuditLog indexes created')
-        
-        Notification.create_indexes()
-        click.echo('✓ Notification indexes created')
-        
+    click.echo('Creating database indexes...')
+    
+    failed = []
+    for model in (User, Vendor, Service, Booking, Payment, Signature, AuditLog, Notification):
+        try:
+            model.create_indexes()
+            click.echo(f'✓ {model.__name__} indexes created')
+        except OperationFailure as e:
+            # e.g. an existing index with the same name but different options;
+            # keep going so one conflict doesn't leave the other models unindexed
+            failed.append(model.__name__)
+            click.echo(f'✗ {model.__name__} indexes failed: {e}', err=True)
+        except Exception as e:
+            click.echo(f'\n❌ Error initializing database: {str(e)}', err=True)
+            return
+    
+    # One-off for services created before prefix search stored 'name_lower'
+    backfilled = Service.backfill_name_lower()
+    if backfilled:
+        click.echo(f'✓ Backfilled name_lower on {backfilled} services')
+    
+    if failed:
+        click.echo(f'\n⚠️  Database initialized with index errors in: {", ".join(failed)}', err=True)
+    else:
         click.echo('\n✅ Database initialized successfully!')
-        
-    except Exception as e:
-        click.echo(f'\n❌ Error initializing database: {str(e)}', err=True)
 
 
 @click.command('monitor-signatures')
@@ -169,20 +164,21 @@ def seed_data():
             }
         ]
         
-        for service_data in services_data:
-            # Check if service already exists
-            if not Service.find_by_name(service_data['name']):
-                Service.create(service_data)
-                click.echo(f'✓ Created service: {service_data["name"]}')
+        # One lookup for the services that already exist, one insert for the rest
+        existing_services = {s['name'] for s in Service.find_by_names([s['name'] for s in services_data])}
+        new_services = [s for s in services_data if s['name'] not in existing_services]
+        Service.bulk_create(new_services)
+        for service_data in new_services:
+            click.echo(f'✓ Created service: {service_data["name"]}')
         
         click.echo(f'\n✅ Sample services created!')
         
         # Create sample users
         click.echo('\nCreating sample users...')
         
-        # Sample customer
-        if not User.find_by_email('customer@test.com'):
-            customer_data = {
+        users_data = [
+            # Sample customer
+            {
                 'email': 'customer@test.com',
                 'password': 'password123',
                 'name': 'John Customer',
@@ -191,13 +187,9 @@ def seed_data():
                 'pincode': '12345',
                 'address': '123 Main St',
                 'verified': True
-            }
-            User.create(customer_data)
-            click.echo('✓ Created customer: customer@test.com')
-        
-        # Sample vendor
-        if not User.find_by_email('vendor@test.com'):
-            vendor_user_data = {
+            },
+            # Sample vendor
+            {
                 'email': 'vendor@test.com',
                 'password': 'password123',
                 'name': 'Mike Vendor',
@@ -206,37 +198,18 @@ def seed_data():
                 'pincode': '12345',
                 'address': '456 Service Ave',
                 'verified': True
-            }
-            vendor_user_id = User.create(vendor_user_data)
-            
-            # Create vendor profile
-            vendor_profile_data = {
-                'user_id': vendor_user_id,
-                'name': 'Mike Vendor',
-                'services': ['Plumbing - Leak Repair', 'Electrical - Wiring'],
-                'pincodes': ['12345', '12346', '12347'],
-                'onboarding_status': Vendor.STATUS_APPROVED,
-                'availability': True
-            }
-            Vendor.create(vendor_profile_data)
-            click.echo('✓ Created vendor: vendor@test.com')
-        
-        # Sample onboard manager
-        if not User.find_by_email('onboard@test.com'):
-            onboard_data = {
+            },
+            # Sample onboard manager
+            {
                 'email': 'onboard@test.com',
                 'password': 'password123',
                 'name': 'Sarah Onboard',
                 'phone': '5551234567',
                 'role': User.ROLE_ONBOARD_MANAGER,
                 'verified': True
-            }
-            User.create(onboard_data)
-            click.echo('✓ Created onboard manager: onboard@test.com')
-        
-        # Sample ops manager
-        if not User.find_by_email('ops@test.com'):
-            ops_data = {
+            },
+            # Sample ops manager
+            {
                 'email': 'ops@test.com',
                 'password': 'password123',
                 'name': 'Tom Operations',
@@ -244,8 +217,35 @@ def seed_data():
                 'role': User.ROLE_OPS_MANAGER,
                 'verified': True
             }
-            User.create(ops_data)
-            click.echo('✓ Created ops manager: ops@test.com')
+        ]
+        
+        existing_emails = {u['email'] for u in User.find_by_emails([u['email'] for u in users_data])}
+        new_users = [u for u in users_data if u['email'] not in existing_emails]
+        inserted_ids = set(User.bulk_create(new_users))
+        
+        vendor_profiles = []
+        for user_data in new_users:
+            user_id = str(user_data['_id'])
+            if user_id not in inserted_ids:
+                continue
+            
+            if user_data['role'] == User.ROLE_VENDOR:
+                # Create vendor profile
+                vendor_profile_data = {
+                    'user_id': user_id,
+                    'name': user_data['name'],
+                    'services': ['Plumbing - Leak Repair', 'Electrical - Wiring'],
+                    'pincodes': ['12345', '12346', '12347'],
+                    'onboarding_status': Vendor.STATUS_APPROVED,
+                    'availability': True
+                }
+                vendor_profiles.append(vendor_profile_data)
+            
+            role_label = user_data['role'].replace('_', ' ')
+            click.echo(f'✓ Created {role_label}: {user_data["email"]}')
+        
+        if vendor_profiles:
+            Vendor.bulk_create(vendor_profiles)
         
         click.echo('\n✅ Database seeded successfully!')
         click.echo('\nSample Credentials:')
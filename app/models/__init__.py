@@ -3,14 +3,20 @@ Models package for HomeServe Pro.
 Contains all MongoDB collection models and schemas.
 """
 
-from app.models.user import User
-from app.models.booking import Booking
-from app.models.vendor import Vendor
-from app.models.service import Service
-from app.models.signature import Signature
-from app.models.payment import Payment
-from app.models.audit_log import AuditLog
-from app.models.notification import Notification
+import importlib
+
+# Models are imported on first access so that ``from app.models import X``
+# only loads the module defining X (PEP 562).
+_MODELS = {
+    'User': 'app.models.user',
+    'Booking': 'app.models.booking',
+    'Vendor': 'app.models.vendor',
+    'Service': 'app.models.service',
+    'Signature': 'app.models.signature',
+    'Payment': 'app.models.payment',
+    'AuditLog': 'app.models.audit_log',
+    'Notification': 'app.models.notification'
+}
 
 __all__ = [
     'User',
@@ -23,3 +29,12 @@ __all__ = [
     'Notification'
 ]
 
+
+def __getattr__(name):
+    """Lazily import model classes (PEP 562)."""
+    module_path = _MODELS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value
+    return value
@@ -3,9 +3,44 @@ Audit Log model for HomeServe Pro.
 Immutable logging system for all critical operations.
 """
 
+import atexit
+import logging
+import threading
+from collections import deque
 from datetime import datetime
 from bson import ObjectId
-from app import mongo
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from pymongo.write_concern import WriteConcern
+from flask import g, has_request_context
+from app.utils.db import cached_collection, drop_indexes
+from app.utils.pagination import apply_cursor, keyset_sort
+
+logger = logging.getLogger(__name__)
+
+# Pending audit entries, written in batches by AuditLog.flush()
+_buffer = deque()
+_flush_lock = threading.Lock()
+
+# Default list order; matches the (timestamp, _id) keyset cursor
+_NEWEST_FIRST = keyset_sort('timestamp')
+
+# Fields copied as-is by AuditLog.to_dict
+_TO_DICT_FIELDS = ('action', 'entity_type', 'entity_id', 'user_id', 'ip_address', 'timestamp')
+
+
+def _request_timestamp():
+    """
+    Return one timestamp shared by every audit entry of the current request.
+
+    Outside a request (CLI, background tasks) a fresh timestamp is returned.
+    """
+    if not has_request_context():
+        return datetime.utcnow()
+    ts = g.get('_audit_ts')
+    if ts is None:
+        ts = g._audit_ts = datetime.utcnow()
+    return ts
 
 
 class AuditLog:
@@ -23,11 +58,28 @@ class AuditLog:
     ACTION_ESCALATION = 'escalation'
     ACTION_PAYMENT = 'payment'
     ACTION_STATUS_CHANGE = 'status_change'
+
+    # Background flush settings
+    FLUSH_INTERVAL_SECONDS = 0.25
+    # Entries held while the database is unreachable; newer ones are dropped
+    MAX_BUFFERED = 10000
+
+    # Entries are expired by a TTL index on 'timestamp' after this many days
+    RETENTION_DAYS = 180
+    
+    @classmethod
+    def _coll(cls):
+        """Return the collection handle, cached per Mongo database."""
+        return cached_collection(cls)
     
     @staticmethod
     def log(action, entity_type, entity_id, user_id, details=None, ip_address=None):
         """
         Create an immutable audit log entry.
+
+        The entry is buffered and written by the background flusher, so the
+        request path never waits on the database. Once MAX_BUFFERED entries
+        are pending the entry is dropped instead.
         
         Args:
             action (str): Action performed
@@ -38,84 +90,170 @@ class AuditLog:
             ip_address (str): IP address of the request
             
         Returns:
-            str: Inserted log ID
+            str: Inserted log ID, or None if the buffer is full
         """
+        if len(_buffer) >= AuditLog.MAX_BUFFERED:
+            logger.warning(f"Audit log buffer full, dropping {action} entry for {entity_type} {entity_id}")
+            return None
+        
         log_entry = {
+            '_id': ObjectId(),
             'action': action,
             'entity_type': entity_type,
             'entity_id': str(entity_id),
             'user_id': str(user_id),
             'details': details or {},
             'ip_address': ip_address,
-            'timestamp': datetime.utcnow()
+            'timestamp': _request_timestamp()
         }
         
-        result = mongo.db[AuditLog.COLLECTION].insert_one(log_entry)
-        return str(result.inserted_id)
+        _buffer.append(log_entry)
+        return str(log_entry['_id'])
+
+    @staticmethod
+    def flush():
+        """
+        Write all buffered audit entries in a single unacknowledged batch.
+
+        Returns:
+            int: Number of entries sent
+        """
+        with _flush_lock:
+            batch = []
+            while _buffer:
+                batch.append(_buffer.popleft())
+            if not batch:
+                return 0
+            try:
+                AuditLog._coll().with_options(
+                    write_concern=WriteConcern(w=0)
+                ).insert_many(batch, ordered=False)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} audit log entries: {str(e)}")
+                return 0
+            return len(batch)
+
+    @staticmethod
+    def run_flusher(sleep):
+        """
+        Flush buffered entries forever; meant for a background task.
+
+        Args:
+            sleep (callable): Cooperative sleep, e.g. ``socketio.sleep``
+        """
+        while True:
+            sleep(AuditLog.FLUSH_INTERVAL_SECONDS)
+            AuditLog.flush()
     
     @staticmethod
-    def find_by_entity(entity_type, entity_id, skip=0, limit=50):
+    def find_by_entity(entity_type, entity_id, skip=0, limit=50, before=None):
         """Find all logs for a specific entity."""
+        query = {
+            'entity_type': entity_type,
+            'entity_id': str(entity_id)
+        }
+        apply_cursor(query, before, field='timestamp')
         return list(
-            mongo.db[AuditLog.COLLECTION]
-            .find({
-                'entity_type': entity_type,
-                'entity_id': str(entity_id)
-            })
-            .sort('timestamp', -1)
+            AuditLog._coll()
+            .find(query)
+            .sort(_NEWEST_FIRST)
             .skip(skip)
             .limit(limit)
         )
     
     @staticmethod
-    def find_by_user(user_id, skip=0, limit=50):
+    def find_by_user(user_id, skip=0, limit=50, before=None):
         """Find all logs for a specific user."""
+        query = {'user_id': str(user_id)}
+        apply_cursor(query, before, field='timestamp')
         return list(
-            mongo.db[AuditLog.COLLECTION]
-            .find({'user_id': str(user_id)})
-            .sort('timestamp', -1)
+            AuditLog._coll()
+            .find(query)
+            .sort(_NEWEST_FIRST)
             .skip(skip)
             .limit(limit)
         )
     
     @staticmethod
-    def find_by_action(action, skip=0, limit=50):
+    def find_by_action(action, skip=0, limit=50, before=None):
         """Find all logs for a specific action type."""
+        query = {'action': action}
+        apply_cursor(query, before, field='timestamp')
         return list(
-            mongo.db[AuditLog.COLLECTION]
-            .find({'action': action})
-            .sort('timestamp', -1)
+            AuditLog._coll()
+            .find(query)
+            .sort(_NEWEST_FIRST)
             .skip(skip)
             .limit(limit)
         )
     
     @staticmethod
-    def find_all(filters=None, skip=0, limit=50):
-        """Find all audit logs with optional filters."""
-        filters = filters or {}
+    def find_all(filters=None, skip=0, limit=50, before=None):
+        """
+        Find all audit logs with optional filters, newest first.
+
+        ``before`` is a parsed keyset cursor (``timestamp`` and ``_id`` of
+        the last log already seen); it replaces ``skip`` for deep pages.
+        """
+        filters = dict(filters or {})
+        apply_cursor(filters, before, field='timestamp')
         return list(
-            mongo.db[AuditLog.COLLECTION]
+            AuditLog._coll()
             .find(filters)
-            .sort('timestamp', -1)
+            .sort(_NEWEST_FIRST)
             .skip(skip)
             .limit(limit)
         )
     
     @staticmethod
     def count(filters=None):
-        """Count audit logs matching filters."""
-        filters = filters or {}
-        return mongo.db[AuditLog.COLLECTION].count_documents(filters)
+        """
+        Count audit logs matching filters.
+
+        With no filters the collection metadata estimate is returned; pass
+        ``{}`` explicitly for an exact total.
+        """
+        if filters is None:
+            return AuditLog._coll().estimated_document_count()
+        return AuditLog._coll().count_documents(filters)
     
     @staticmethod
     def create_indexes():
         """Create database indexes for optimal performance."""
-        mongo.db[AuditLog.COLLECTION].create_index('entity_type')
-        mongo.db[AuditLog.COLLECTION].create_index('entity_id')
-        mongo.db[AuditLog.COLLECTION].create_index('user_id')
-        mongo.db[AuditLog.COLLECTION].create_index('action')
-        mongo.db[AuditLog.COLLECTION].create_index('timestamp')
-        mongo.db[AuditLog.COLLECTION].create_index([('entity_type', 1), ('entity_id', 1), ('timestamp', -1)])
+        coll = AuditLog._coll()
+        ttl_seconds = AuditLog.RETENTION_DAYS * 24 * 3600
+
+        # Older releases built a plain 'timestamp_1' index, which has the same
+        # name as the TTL index and would make createIndexes fail. Convert it
+        # in place; servers that cannot (before MongoDB 5.1) rebuild it
+        timestamp_index = coll.index_information().get('timestamp_1')
+        if timestamp_index is not None and timestamp_index.get('expireAfterSeconds') != ttl_seconds:
+            try:
+                coll.database.command({
+                    'collMod': coll.name,
+                    'index': {'keyPattern': {'timestamp': 1}, 'expireAfterSeconds': ttl_seconds}
+                })
+            except OperationFailure:
+                coll.drop_index('timestamp_1')
+
+        # Superseded by the compound indexes below, which cover them as prefixes
+        drop_indexes(coll, ['entity_type_1', 'user_id_1', 'action_1',
+                            'entity_type_1_entity_id_1_timestamp_-1'])
+
+        coll.create_indexes([
+            IndexModel([('entity_id', ASCENDING)]),
+            IndexModel([('user_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)]),
+            IndexModel([('action', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)]),
+            IndexModel([('timestamp', DESCENDING), ('_id', DESCENDING)]),
+            # Also serves single-field 'entity_type' lookups via its prefix
+            IndexModel([('entity_type', ASCENDING), ('entity_id', ASCENDING),
+                        ('timestamp', DESCENDING), ('_id', DESCENDING)]),
+            # Retention; TTL indexes must be single-field
+            IndexModel(
+                [('timestamp', ASCENDING)],
+                expireAfterSeconds=ttl_seconds
+            )
+        ])
     
     @staticmethod
     def to_dict(log):
@@ -123,14 +261,11 @@ class AuditLog:
         if not log:
             return None
         
-        return {
-            'id': str(log['_id']),
-            'action': log.get('action'),
-            'entity_type': log.get('entity_type'),
-            'entity_id': log.get('entity_id'),
-            'user_id': log.get('user_id'),
-            'details': log.get('details', {}),
-            'ip_address': log.get('ip_address'),
-            'timestamp': log.get('timestamp')
-        }
+        result = {k: log.get(k) for k in _TO_DICT_FIELDS}
+        result['id'] = str(log['_id'])
+        result['details'] = log.get('details', {})
+        return result
+
 
+# Don't lose buffered entries when the process exits
+atexit.register(AuditLog.flush)
@@ -4,8 +4,36 @@ Manages service bookings between customers and vendors.
 """
 
 from datetime import datetime
-from bson import ObjectId
-from app import mongo
+from pymongo import IndexModel, ReturnDocument, ASCENDING, DESCENDING
+from app.utils.db import as_object_id, cached_collection, drop_indexes, to_object_id
+from app.utils.pagination import apply_cursor, keyset_sort
+
+
+# Projection for list views: drops the photo URL arrays and signature hash,
+# which only the booking detail views need
+LIST_PROJECTION = {'before_photos': 0, 'after_photos': 0, 'signature_hash': 0}
+DETAIL_PROJECTION = None
+
+# Default list order; matches the (created_at, _id) keyset cursor
+_NEWEST_FIRST = keyset_sort('created_at')
+
+# Partial indexes for the signature scans (see create_indexes); the scans'
+# filters repeat the partial conditions, so the planner picks them up
+SIGNATURE_TIMEOUT_INDEX = [('signature_timeout_at', ASCENDING)]
+PENDING_SIGNATURES_INDEX = [('signature_status', ASCENDING), ('updated_at', ASCENDING)]
+
+# Reference fields stored as ObjectId
+_OID_FIELDS = ('customer_id', 'vendor_id', 'service_id')
+
+# ID fields coerced in query filters
+_FILTER_ID_FIELDS = frozenset(_OID_FIELDS + ('_id',))
+
+# Fields copied as-is by Booking.to_dict
+_TO_DICT_FIELDS = (
+    'status', 'service_date', 'service_time', 'address', 'pincode',
+    'description', 'signature_status', 'signature_hash', 'payment_status',
+    'amount', 'created_at', 'updated_at', 'rating', 'review'
+)
 
 
 class Booking:
@@ -22,7 +50,7 @@ class Booking:
     STATUS_VERIFIED = 'verified'
     STATUS_CANCELLED = 'cancelled'
     
-    VALID_STATUSES = [
+    VALID_STATUSES = frozenset({
         STATUS_PENDING,
         STATUS_ACCEPTED,
         STATUS_REJECTED,
@@ -30,7 +58,40 @@ class Booking:
         STATUS_COMPLETED,
         STATUS_VERIFIED,
         STATUS_CANCELLED
-    ]
+    })
+    
+    # Documents fetched per round trip when streaming unbounded scans
+    PENDING_SIGNATURES_BATCH_SIZE = 200
+
+    # Most recent photos kept per before/after list
+    MAX_PHOTOS = 20
+    
+    @classmethod
+    def _coll(cls):
+        """Return the collection handle, cached per Mongo database."""
+        return cached_collection(cls)
+    
+    @staticmethod
+    def _coerce_ids(data):
+        """Convert string reference IDs in ``data`` to ObjectId, in place."""
+        for field in _OID_FIELDS:
+            if field in data:
+                data[field] = as_object_id(data[field])
+        return data
+    
+    @staticmethod
+    def _coerce_filter_ids(filters):
+        """
+        Convert string ID values in a query filter to ObjectId, in place.
+
+        Strings that are not valid ObjectIds are left as they are, so the
+        query simply matches nothing.
+        """
+        for key in _FILTER_ID_FIELDS & filters.keys():
+            value = filters[key]
+            if type(value) is str:
+                filters[key] = to_object_id(value) or value
+        return filters
     
     @staticmethod
     def create(data):
@@ -43,13 +104,7 @@ class Booking:
         Returns:
             str: Inserted booking ID
         """
-        # Convert string IDs to ObjectId
-        if 'customer_id' in data and isinstance(data['customer_id'], str):
-            data['customer_id'] = ObjectId(data['customer_id'])
-        if 'vendor_id' in data and isinstance(data['vendor_id'], str):
-            data['vendor_id'] = ObjectId(data['vendor_id'])
-        if 'service_id' in data and isinstance(data['service_id'], str):
-            data['service_id'] = ObjectId(data['service_id'])
+        Booking._coerce_ids(data)
         
         # Set defaults
         data.setdefault('status', Booking.STATUS_PENDING)
@@ -62,61 +117,99 @@ class Booking:
         data.setdefault('signature_timeout_at', None)
         data.setdefault('signature_escalated', False)
         data.setdefault('payment_status', 'pending')
-        data.setdefault('created_at', datetime.utcnow())
-        data.setdefault('updated_at', datetime.utcnow())
+        now = datetime.utcnow()
+        data.setdefault('created_at', now)
+        data.setdefault('updated_at', now)
         
         # Validate status
         if data.get('status') not in Booking.VALID_STATUSES:
-            raise ValueError(f"Invalid status. Must be one of {Booking.VALID_STATUSES}")
+            raise ValueError(f"Invalid status. Must be one of {sorted(Booking.VALID_STATUSES)}")
         
-        result = mongo.db[Booking.COLLECTION].insert_one(data)
+        result = Booking._coll().insert_one(data)
         return str(result.inserted_id)
     
+    @staticmethod
+    def _results(cursor, limit, lazy):
+        """
+        Materialize a finder's cursor, or hand it back for lazy iteration.
+
+        Lazy cursors fetch the whole page in one batch; callers that need a
+        length should use count() instead of len().
+        """
+        if not lazy:
+            return list(cursor)
+        if limit:
+            cursor = cursor.batch_size(limit)
+        return cursor
+    
     @staticmethod
     def find_by_id(booking_id):
         """Find booking by ID."""
-        try:
-            return mongo.db[Booking.COLLECTION].find_one({'_id': ObjectId(booking_id)})
-        except:
+        booking_oid = to_object_id(booking_id)
+        if booking_oid is None:
             return None
+        return Booking._coll().find_one({'_id': booking_oid})
     
     @staticmethod
-    def find_by_customer(customer_id, skip=0, limit=20):
-        """Find all bookings for a customer."""
-        try:
-            customer_oid = ObjectId(customer_id)
-            return list(
-                mongo.db[Booking.COLLECTION]
-                .find({'customer_id': customer_oid})
-                .sort('created_at', -1)
-                .skip(skip)
-                .limit(limit)
-            )
-        except:
+    def find_by_customer(customer_id, skip=0, limit=20, before=None, projection=None, lazy=False):
+        """
+        Find all bookings for a customer, newest first.
+
+        Pass ``before`` (the parsed ``next_cursor`` of the previous page)
+        to page with an index range scan instead of ``skip``, and
+        ``projection`` (e.g. LIST_PROJECTION) to trim list payloads.
+        With ``lazy=True`` the cursor is returned for single-pass iteration.
+        """
+        customer_oid = to_object_id(customer_id)
+        if customer_oid is None:
             return []
+        query = {'customer_id': customer_oid}
+        apply_cursor(query, before)
+        cursor = (
+            Booking._coll()
+            .find(query, projection)
+            .sort(_NEWEST_FIRST)
+            .skip(skip)
+            .limit(limit)
+        )
+        return Booking._results(cursor, limit, lazy)
     
     @staticmethod
-    def find_by_vendor(vendor_id, skip=0, limit=20):
-        """Find all bookings for a vendor."""
-        try:
-            vendor_oid = ObjectId(vendor_id)
-            return list(
-                mongo.db[Booking.COLLECTION]
-                .find({'vendor_id': vendor_oid})
-                .sort('created_at', -1)
-                .skip(skip)
-                .limit(limit)
-            )
-        except:
+    def find_by_vendor(vendor_id, skip=0, limit=20, before=None, projection=None, lazy=False, status=None):
+        """
+        Find all bookings for a vendor, newest first.
+
+        Pass ``before`` (the parsed ``next_cursor`` of the previous page)
+        to page with an index range scan instead of ``skip``, and
+        ``projection`` (e.g. LIST_PROJECTION) to trim list payloads.
+        With ``lazy=True`` the cursor is returned for single-pass iteration.
+        ``status`` restricts the page to bookings in that status.
+        """
+        vendor_oid = to_object_id(vendor_id)
+        if vendor_oid is None:
             return []
+        query = {'vendor_id': vendor_oid}
+        if status:
+            query['status'] = status
+        apply_cursor(query, before)
+        cursor = (
+            Booking._coll()
+            .find(query, projection)
+            .sort(_NEWEST_FIRST)
+            .skip(skip)
+            .limit(limit)
+        )
+        return Booking._results(cursor, limit, lazy)
     
     @staticmethod
-    def find_by_status(status, skip=0, limit=20):
-        """Find bookings by status."""
+    def find_by_status(status, skip=0, limit=20, before=None, projection=None):
+        """Find bookings by status, newest first (``before``: keyset cursor)."""
+        query = {'status': status}
+        apply_cursor(query, before)
         return list(
-            mongo.db[Booking.COLLECTION]
-            .find({'status': status})
-            .sort('created_at', -1)
+            Booking._coll()
+            .find(query, projection)
+            .sort(_NEWEST_FIRST)
             .skip(skip)
             .limit(limit)
         )
@@ -131,15 +224,21 @@ class Booking:
             data (dict): Data to update
             
         Returns:
-            bool: True if updated successfully
+            dict: Updated booking document, or None if not found
         """
-        data['updated_at'] = datetime.utcnow()
+        Booking._coerce_ids(data)
         
-        result = mongo.db[Booking.COLLECTION].update_one(
-            {'_id': ObjectId(booking_id)},
-            {'$set': data}
+        # updated_at is stamped server-side via $currentDate
+        data.pop('updated_at', None)
+        
+        update = {'$currentDate': {'updated_at': True}}
+        if data:
+            update['$set'] = data
+        return Booking._coll().find_one_and_update(
+            {'_id': as_object_id(booking_id)},
+            update,
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
     
     @staticmethod
     def update_status(booking_id, status):
@@ -157,130 +256,220 @@ class Booking:
             booking_id (str): Booking ID
             photo_url (str): URL of uploaded photo
             photo_type (str): 'before' or 'after'
+
+        Only the newest MAX_PHOTOS entries are kept, so the list cannot grow
+        without bound.
         """
         field = f'{photo_type}_photos'
-        result = mongo.db[Booking.COLLECTION].update_one(
-            {'_id': ObjectId(booking_id)},
+        result = Booking._coll().update_one(
+            {'_id': as_object_id(booking_id)},
             {
-                '$push': {field: photo_url},
-                '$set': {'updated_at': datetime.utcnow()}
+                '$push': {field: {'$each': [photo_url], '$slice': -Booking.MAX_PHOTOS}},
+                '$currentDate': {'updated_at': True}
             }
         )
         return result.modified_count > 0
     
     @staticmethod
-    def find_all(filters=None, sort=None, skip=0, limit=20):
+    def find_all(filters=None, sort=None, skip=0, limit=20, before=None, projection=None,
+                 lazy=False):
         """Find all bookings with optional filters and sorting.
         Args:
             filters (dict): Mongo query filters
             sort (list|tuple|str): e.g., [('created_at', -1)] or 'created_at'
             skip (int): number of documents to skip
             limit (int): max documents to return
+            before (tuple): parsed keyset cursor; only bookings after it
+                (use with the default newest-first sort)
+            projection (dict): fields to return, e.g. LIST_PROJECTION
+            lazy (bool): return the cursor instead of a list
         """
-        filters = filters or {}
-        # Coerce common ID fields from string to ObjectId when possible
-        try:
-            for key in ('vendor_id', 'customer_id', 'service_id', '_id'):
-                if key in filters and isinstance(filters[key], str):
-                    filters[key] = ObjectId(filters[key])
-        except Exception:
-            pass
-        cursor = mongo.db[Booking.COLLECTION].find(filters)
+        filters = dict(filters or {})
+        apply_cursor(filters, before)
+        Booking._coerce_filter_ids(filters)
+        cursor = Booking._coll().find(filters, projection)
         if sort:
             cursor = cursor.sort(sort)
         else:
-            cursor = cursor.sort('created_at', -1)
+            cursor = cursor.sort(_NEWEST_FIRST)
         if skip:
             cursor = cursor.skip(skip)
         if limit:
             cursor = cursor.limit(limit)
-        return list(cursor)
+        return Booking._results(cursor, limit, lazy)
+
+    @staticmethod
+    def find_page(filters=None, sort=None, skip=0, limit=20, before=None, projection=None):
+        """
+        Fetch one page of bookings and the total match count in one round trip.
+
+        ``$match`` and ``$sort`` run ahead of the ``$facet`` so they can use
+        an index; the facet then slices the page and counts the matches.
+        Meant for admin list views, where the filtered set is moderate.
+        Keyset pages (``before``) use a plain ``find`` with the cursor in the
+        filter, plus a separate count of every match.
+
+        Args:
+            filters (dict): Mongo query filters
+            sort (list): e.g. [('created_at', -1)]; defaults to newest first
+            skip (int): number of documents to skip
+            limit (int): max documents to return
+            before (tuple): parsed keyset cursor (default sort only); the
+                total still counts every match
+            projection (dict): fields to exclude/include, e.g. LIST_PROJECTION
+
+        Returns:
+            tuple: (list of booking documents, total matching count)
+        """
+        filters = Booking._coerce_filter_ids(dict(filters or {}))
+
+        if before:
+            query = apply_cursor(dict(filters), before)
+            cursor = Booking._coll().find(query, projection).sort(_NEWEST_FIRST).skip(skip).limit(limit)
+            return list(cursor), Booking._coll().count_documents(filters)
+
+        page = []
+        if skip:
+            page.append({'$skip': skip})
+        page.append({'$limit': limit})
+        if projection:
+            page.append({'$project': projection})
+
+        pipeline = [
+            {'$match': filters},
+            {'$sort': dict(sort or _NEWEST_FIRST)},
+            {'$facet': {'data': page, 'total': [{'$count': 'n'}]}}
+        ]
+        result = next(Booking._coll().aggregate(pipeline), None) or {}
+        total = result.get('total')
+        return result.get('data', []), total[0]['n'] if total else 0
 
     @staticmethod
     def count(filters=None):
-        """Count bookings matching filters."""
-        filters = filters or {}
-        # Coerce common ID fields from string to ObjectId when possible
-        try:
-            for key in ('vendor_id', 'customer_id', 'service_id', '_id'):
-                if key in filters and isinstance(filters[key], str):
-                    filters[key] = ObjectId(filters[key])
-        except Exception:
-            pass
-        return mongo.db[Booking.COLLECTION].count_documents(filters)
+        """
+        Count bookings matching filters.
+
+        With no filters the collection metadata estimate is returned; pass
+        ``{}`` explicitly for an exact total.
+        """
+        if filters is None:
+            return Booking._coll().estimated_document_count()
+        filters = Booking._coerce_filter_ids(dict(filters))
+        return Booking._coll().count_documents(filters)
 
     @staticmethod
-    def get_pending_signatures(days=2):
-        """Get bookings with pending signatures older than specified days."""
+    def _pending_signatures_query(days):
+        """Build the filter for completed bookings still awaiting a signature."""
         from datetime import timedelta
         cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-        return list(
-            mongo.db[Booking.COLLECTION].find({
-                'status': Booking.STATUS_COMPLETED,
-                'signature_status': {'$in': ['unsigned', 'requested']},
-                'updated_at': {'$lt': cutoff_date}
-            })
-        )
+        return {
+            'status': Booking.STATUS_COMPLETED,
+            'signature_status': {'$in': ['unsigned', 'requested']},
+            'updated_at': {'$lt': cutoff_date}
+        }
+
+    @staticmethod
+    def get_pending_signatures(days=2):
+        """
+        Get bookings with pending signatures older than specified days.
+
+        The result is unbounded, so a cursor is returned and documents are
+        fetched in batches as the caller iterates.
+
+        Args:
+            days (int): Minimum age in days since the booking was completed
+
+        Returns:
+            Cursor: Matching booking documents
+        """
+        return Booking._coll().find(
+            Booking._pending_signatures_query(days)
+        ).batch_size(Booking.PENDING_SIGNATURES_BATCH_SIZE)
+
+    @staticmethod
+    def count_pending_signatures(days=2):
+        """Count bookings with pending signatures older than specified days."""
+        return Booking._coll().count_documents(Booking._pending_signatures_query(days))
 
     @staticmethod
     def request_signature(booking_id, timeout_hours=48):
-        """Request signature for a completed booking."""
+        """
+        Request signature for a completed booking.
+
+        Returns:
+            dict: Updated booking document, or None if not found
+        """
         from datetime import timedelta
         timeout_at = datetime.utcnow() + timedelta(hours=timeout_hours)
 
-        result = mongo.db[Booking.COLLECTION].update_one(
-            {'_id': ObjectId(booking_id)},
+        return Booking._coll().find_one_and_update(
+            {'_id': as_object_id(booking_id)},
             {
                 '$set': {
                     'signature_status': 'requested',
-                    'signature_requested_at': datetime.utcnow(),
-                    'signature_timeout_at': timeout_at,
-                    'updated_at': datetime.utcnow()
-                }
-            }
+                    'signature_timeout_at': timeout_at
+                },
+                '$currentDate': {'signature_requested_at': True, 'updated_at': True}
+            },
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
 
     @staticmethod
     def submit_signature(booking_id, signature_hash):
-        """Submit signature for a booking."""
-        result = mongo.db[Booking.COLLECTION].update_one(
-            {'_id': ObjectId(booking_id)},
+        """
+        Submit signature for a booking.
+
+        Returns:
+            dict: Updated booking document, or None if not found or
+            already signed
+        """
+        return Booking._coll().find_one_and_update(
+            {'_id': as_object_id(booking_id), 'signature_status': {'$ne': 'signed'}},
             {
                 '$set': {
                     'signature_status': 'signed',
                     'signature_hash': signature_hash,
-                    'signature_submitted_at': datetime.utcnow(),
-                    'status': Booking.STATUS_VERIFIED,
-                    'updated_at': datetime.utcnow()
-                }
-            }
+                    'status': Booking.STATUS_VERIFIED
+                },
+                '$currentDate': {'signature_submitted_at': True, 'updated_at': True}
+            },
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
 
     @staticmethod
     def escalate_signature_timeout(booking_id):
-        """Escalate booking due to signature timeout."""
-        result = mongo.db[Booking.COLLECTION].update_one(
-            {'_id': ObjectId(booking_id)},
+        """
+        Escalate booking due to signature timeout.
+
+        Returns:
+            dict: Updated booking document, or None if not found or
+            already escalated
+        """
+        return Booking._coll().find_one_and_update(
+            {'_id': as_object_id(booking_id), 'signature_escalated': {'$ne': True}},
             {
                 '$set': {
                     'signature_status': 'expired',
-                    'signature_escalated': True,
-                    'updated_at': datetime.utcnow()
-                }
-            }
+                    'signature_escalated': True
+                },
+                '$currentDate': {'updated_at': True}
+            },
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
 
     @staticmethod
     def get_expired_signatures():
-        """Get bookings with expired signature requests."""
+        """
+        Get bookings with expired signature requests.
+
+        The filter repeats the partial index's conditions, so the planner
+        can answer it from that index.
+        """
         current_time = datetime.utcnow()
 
         return list(
-            mongo.db[Booking.COLLECTION].find({
+            Booking._coll().find({
                 'signature_status': 'requested',
                 'signature_timeout_at': {'$lt': current_time},
                 'signature_escalated': False
@@ -290,45 +479,71 @@ class Booking:
     @staticmethod
     def create_indexes():
         """Create database indexes for optimal performance."""
-        mongo.db[Booking.COLLECTION].create_index('customer_id')
-        mongo.db[Booking.COLLECTION].create_index('vendor_id')
-        mongo.db[Booking.COLLECTION].create_index('service_id')
-        mongo.db[Booking.COLLECTION].create_index('status')
-        mongo.db[Booking.COLLECTION].create_index('signature_status')
-        mongo.db[Booking.COLLECTION].create_index('payment_status')
-        mongo.db[Booking.COLLECTION].create_index('signature_timeout_at')
-        mongo.db[Booking.COLLECTION].create_index('signature_escalated')
-        mongo.db[Booking.COLLECTION].create_index([('status', 1), ('created_at', -1)])
-        mongo.db[Booking.COLLECTION].create_index([('vendor_id', 1), ('status', 1)])
-        mongo.db[Booking.COLLECTION].create_index([('signature_status', 1), ('signature_timeout_at', 1)])
-        mongo.db[Booking.COLLECTION].create_index([('status', 1), ('signature_status', 1)])
+        coll = Booking._coll()
+        # Superseded by the partial 'pending_signature_timeout' index; the
+        # first would also block it, since it has the same default name
+        drop_indexes(coll, ['signature_timeout_at_1', 'signature_escalated_1'])
+        # Covered by the customer/vendor/status/signature_status compound
+        # index prefixes below
+        drop_indexes(coll, ['customer_id_1', 'vendor_id_1', 'status_1', 'signature_status_1'])
+        # Replaced by the (status, created_at, _id) keyset index
+        drop_indexes(coll, ['status_1_created_at_-1'])
+
+        coll.create_indexes([
+            # Keyset pages for find_by_customer/find_by_vendor/find_by_status
+            IndexModel([('customer_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+            IndexModel([('vendor_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+            IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+            # Unfiltered keyset pages in find_page
+            IndexModel(_NEWEST_FIRST),
+            IndexModel([('service_id', ASCENDING)]),
+            IndexModel([('payment_status', ASCENDING)]),
+            # Signature timeout/reminder scans: only open, unescalated requests
+            IndexModel(
+                SIGNATURE_TIMEOUT_INDEX,
+                name='pending_signature_timeout',
+                partialFilterExpression={'signature_status': 'requested', 'signature_escalated': False}
+            ),
+            # Also serves single-field 'vendor_id' lookups via its prefix
+            IndexModel([('vendor_id', ASCENDING), ('status', ASCENDING)]),
+            # Also serves single-field 'signature_status' lookups via its prefix
+            IndexModel([('signature_status', ASCENDING), ('signature_timeout_at', ASCENDING)]),
+            IndexModel([('status', ASCENDING), ('signature_status', ASCENDING)]),
+            # get_pending_signatures: only completed bookings are indexed
+            IndexModel(
+                PENDING_SIGNATURES_INDEX,
+                partialFilterExpression={'status': Booking.STATUS_COMPLETED}
+            )
+        ])
+    
+    @staticmethod
+    def to_json_doc(booking):
+        """
+        Convert booking document to a dictionary for JSON responses.
+
+        Same fields as to_dict(), but IDs are left as ObjectId for the app's
+        JSON provider to encode, and missing IDs are None.
+        """
+        if not booking:
+            return None
+        
+        result = {k: booking.get(k) for k in _TO_DICT_FIELDS}
+        result['id'] = booking['_id']
+        for field in _OID_FIELDS:
+            result[field] = booking.get(field)
+        result['before_photos'] = booking.get('before_photos', [])
+        result['after_photos'] = booking.get('after_photos', [])
+        return result
     
     @staticmethod
     def to_dict(booking):
         """Convert booking document to dictionary."""
-        if not booking:
+        result = Booking.to_json_doc(booking)
+        if result is None:
             return None
         
-        return {
-            'id': str(booking['_id']),
-            'service_id': str(booking.get('service_id')),
-            'customer_id': str(booking.get('customer_id')),
-            'vendor_id': str(booking.get('vendor_id')),
-            'status': booking.get('status'),
-            'service_date': booking.get('service_date'),
-            'service_time': booking.get('service_time'),
-            'address': booking.get('address'),
-            'pincode': booking.get('pincode'),
-            'description': booking.get('description'),
-            'before_photos': booking.get('before_photos', []),
-            'after_photos': booking.get('after_photos', []),
-            'signature_status': booking.get('signature_status'),
-            'signature_hash': booking.get('signature_hash'),
-            'payment_status': booking.get('payment_status'),
-            'amount': booking.get('amount'),
-            'created_at': booking.get('created_at'),
-            'updated_at': booking.get('updated_at'),
-            'rating': booking.get('rating'),
-            'review': booking.get('review')
-        }
+        result['id'] = str(result['id'])
+        for field in _OID_FIELDS:
+            result[field] = str(result[field])
+        return result
 
@@ -4,8 +4,18 @@ Manages real-time notifications for all users.
 """
 
 from datetime import datetime
-from bson import ObjectId
-from app import mongo
+from pymongo import IndexModel, InsertOne, ASCENDING, DESCENDING
+from app.utils.db import as_object_id, cached_collection, drop_indexes, insert_many_unordered, queue_write, to_object_id
+
+
+# Projection for summary lists: drops the free-form ``data`` payload
+SUMMARY_PROJECTION = {'data': 0}
+
+# Serves find_by_user
+USER_INBOX_INDEX = [('user_id', ASCENDING), ('read', ASCENDING), ('created_at', DESCENDING)]
+
+# Partial index holding only unread notifications; serves count_unread
+UNREAD_INDEX_NAME = 'unread_by_user'
 
 
 class Notification:
@@ -17,7 +27,9 @@ class Notification:
     TYPE_BOOKING_CREATED = 'booking_created'
     TYPE_BOOKING_ACCEPTED = 'booking_accepted'
     TYPE_BOOKING_REJECTED = 'booking_rejected'
+    TYPE_BOOKING_STARTED = 'booking_started'
     TYPE_BOOKING_COMPLETED = 'booking_completed'
+    TYPE_BOOKING_RESCHEDULED = 'booking_rescheduled'
     TYPE_SIGNATURE_REQUEST = 'signature_request'
     TYPE_SIGNATURE_REQUIRED = 'signature_required'
     TYPE_SIGNATURE_COMPLETED = 'signature_completed'
@@ -25,9 +37,59 @@ class Notification:
     TYPE_ESCALATION = 'escalation'
     TYPE_PAYMENT_RECEIVED = 'payment_received'
     TYPE_PAYMENT_RELEASED = 'payment_released'
+    TYPE_PAYOUT_REQUESTED = 'payout_requested'
     TYPE_VENDOR_APPROVED = 'vendor_approved'
     TYPE_VENDOR_REJECTED = 'vendor_rejected'
     TYPE_VENDOR_REGISTRATION = 'vendor_registration'
+    TYPE_VENDOR_VERIFICATION_REQUEST = 'vendor_verification_request'
+    TYPE_SUPPORT_TICKET = 'support_ticket'
+    TYPE_SYSTEM_ANNOUNCEMENT = 'system_announcement'
+
+    VALID_TYPES = frozenset({
+        TYPE_BOOKING_CREATED,
+        TYPE_BOOKING_ACCEPTED,
+        TYPE_BOOKING_REJECTED,
+        TYPE_BOOKING_STARTED,
+        TYPE_BOOKING_COMPLETED,
+        TYPE_BOOKING_RESCHEDULED,
+        TYPE_SIGNATURE_REQUEST,
+        TYPE_SIGNATURE_REQUIRED,
+        TYPE_SIGNATURE_COMPLETED,
+        TYPE_SIGNATURE_REMINDER,
+        TYPE_ESCALATION,
+        TYPE_PAYMENT_RECEIVED,
+        TYPE_PAYMENT_RELEASED,
+        TYPE_PAYOUT_REQUESTED,
+        TYPE_VENDOR_APPROVED,
+        TYPE_VENDOR_REJECTED,
+        TYPE_VENDOR_REGISTRATION,
+        TYPE_VENDOR_VERIFICATION_REQUEST,
+        TYPE_SUPPORT_TICKET,
+        TYPE_SYSTEM_ANNOUNCEMENT
+    })
+
+    # Read notifications are expired by a TTL index after this many days
+    RETENTION_DAYS = 30
+
+    @classmethod
+    def _coll(cls):
+        """Return the collection handle, cached per Mongo database."""
+        return cached_collection(cls)
+
+    @staticmethod
+    def _prepare(data, now=None):
+        """Validate, coerce IDs and fill defaults on a notification document, in place."""
+        if data.get('type') not in Notification.VALID_TYPES:
+            raise ValueError(f"Invalid notification type. Must be one of {sorted(Notification.VALID_TYPES)}")
+
+        # Convert user_id to ObjectId
+        if 'user_id' in data:
+            data['user_id'] = as_object_id(data['user_id'])
+
+        # Set defaults
+        data.setdefault('read', False)
+        data.setdefault('created_at', now or datetime.utcnow())
+        return data
 
     @staticmethod
     def create(data):
@@ -40,19 +102,71 @@ class Notification:
         Returns:
             str: Inserted notification ID
         """
-        # Convert user_id to ObjectId
-        if 'user_id' in data and isinstance(data['user_id'], str):
-            data['user_id'] = ObjectId(data['user_id'])
-
-        # Set defaults
-        data.setdefault('read', False)
-        data.setdefault('created_at', datetime.utcnow())
+        Notification._prepare(data)
 
-        result = mongo.db[Notification.COLLECTION].insert_one(data)
+        result = Notification._coll().insert_one(data)
         return str(result.inserted_id)
 
     @staticmethod
-    def find_by_user(user_id, unread_only=False, skip=0, limit=20):
+    def queue_create(data):
+        """
+        Create a notification as part of the request's batched writes.
+
+        The document is validated now but inserted at request teardown
+        together with the request's other queued writes (see
+        app.utils.db.queue_write). Use create() instead when the
+        notification is emitted over the socket or otherwise referenced
+        before the request ends, since it is not readable until then.
+
+        Args:
+            data (dict): Notification data
+        """
+        Notification._prepare(data)
+
+        queue_write(Notification._coll(), InsertOne(data))
+
+    @staticmethod
+    def bulk_create(docs):
+        """
+        Create several notifications (e.g. one per recipient of a broadcast)
+        with a single unordered insert.
+
+        Use ``bulk_write`` directly for batches that mix inserts and updates.
+
+        Args:
+            docs (list): Notification data dicts, as accepted by create()
+
+        Returns:
+            list: Inserted notification IDs
+        """
+        now = datetime.utcnow()
+        for data in docs:
+            Notification._prepare(data, now)
+
+        return insert_many_unordered(Notification._coll(), docs)
+
+    @staticmethod
+    def queue_for_admins(data):
+        """
+        Queue a copy of a notification for every super admin.
+
+        Notifications have no role-addressed recipient, so the admin copies
+        are fanned out here instead of passing a placeholder user_id. Each
+        copy is validated now and inserted at request teardown, as with
+        queue_create().
+
+        Args:
+            data (dict): Notification data, without 'user_id'
+        """
+        from app.models.user import User
+        admins = User.find_all({'role': User.ROLE_SUPER_ADMIN}, limit=0, projection={'_id': 1})
+        now = datetime.utcnow()
+        for admin in admins:
+            doc = Notification._prepare(dict(data, user_id=admin['_id']), now)
+            queue_write(Notification._coll(), InsertOne(doc))
+
+    @staticmethod
+    def find_by_user(user_id, unread_only=False, skip=0, limit=20, summary=False):
         """
         Find notifications for a user.
 
@@ -61,26 +175,26 @@ class Notification:
             unread_only (bool): Return only unread notifications
             skip (int): Number to skip
             limit (int): Maximum number to return
+            summary (bool): Leave out the ``data`` payload
 
         Returns:
             list: List of notifications
         """
-        try:
-            user_oid = ObjectId(user_id)
-            query = {'user_id': user_oid}
-
-            if unread_only:
-                query['read'] = False
-
-            return list(
-                mongo.db[Notification.COLLECTION]
-                .find(query)
-                .sort('created_at', -1)
-                .skip(skip)
-                .limit(limit)
-            )
-        except:
+        user_oid = to_object_id(user_id)
+        if user_oid is None:
             return []
+        query = {'user_id': user_oid}
+
+        if unread_only:
+            query['read'] = False
+
+        return list(
+            Notification._coll()
+            .find(query, SUMMARY_PROJECTION if summary else None)
+            .sort('created_at', -1)
+            .skip(skip)
+            .limit(limit)
+        )
 
 
     @staticmethod
@@ -96,12 +210,9 @@ class Notification:
         """
         filters = filters or {}
         # Coerce string IDs to ObjectId when applicable
-        try:
-            if 'user_id' in filters and isinstance(filters['user_id'], str):
-                filters['user_id'] = ObjectId(filters['user_id'])
-        except Exception:
-            pass
-        cursor = mongo.db[Notification.COLLECTION].find(filters)
+        if type(filters.get('user_id')) is str:
+            filters['user_id'] = to_object_id(filters['user_id']) or filters['user_id']
+        cursor = Notification._coll().find(filters)
         if sort:
             cursor = cursor.sort(sort)
         if skip:
@@ -113,12 +224,9 @@ class Notification:
     def count(filters=None):
         """Count notifications matching filters."""
         filters = filters or {}
-        try:
-            if 'user_id' in filters and isinstance(filters['user_id'], str):
-                filters['user_id'] = ObjectId(filters['user_id'])
-        except Exception:
-            pass
-        return mongo.db[Notification.COLLECTION].count_documents(filters)
+        if type(filters.get('user_id')) is str:
+            filters['user_id'] = to_object_id(filters['user_id']) or filters['user_id']
+        return Notification._coll().count_documents(filters)
 
 
 
@@ -126,44 +234,46 @@ class Notification:
     @staticmethod
     def mark_as_read(notification_id):
         """Mark notification as read."""
-        result = mongo.db[Notification.COLLECTION].update_one(
-            {'_id': ObjectId(notification_id)},
-            {'$set': {'read': True, 'read_at': datetime.utcnow()}}
+        result = Notification._coll().update_one(
+            {'_id': as_object_id(notification_id)},
+            {'$set': {'read': True}, '$currentDate': {'read_at': True}}
         )
         return result.modified_count > 0
 
     @staticmethod
     def mark_all_as_read(user_id):
         """Mark all notifications as read for a user."""
-        try:
-            user_oid = ObjectId(user_id)
-            result = mongo.db[Notification.COLLECTION].update_many(
-                {'user_id': user_oid, 'read': False},
-                {'$set': {'read': True, 'read_at': datetime.utcnow()}}
-            )
-            return result.modified_count
-        except:
+        user_oid = to_object_id(user_id)
+        if user_oid is None:
             return 0
+        result = Notification._coll().update_many(
+            {'user_id': user_oid, 'read': False},
+            {'$set': {'read': True}, '$currentDate': {'read_at': True}}
+        )
+        return result.modified_count
 
     @staticmethod
     def count_unread(user_id):
         """Count unread notifications for a user."""
-        try:
-            user_oid = ObjectId(user_id)
-            return mongo.db[Notification.COLLECTION].count_documents({
-                'user_id': user_oid,
-                'read': False
-            })
-        except:
+        user_oid = to_object_id(user_id)
+        if user_oid is None:
             return 0
+        # The filter satisfies the partial index's condition, so the planner
+        # counts from it once it exists; no hint, which would fail before then
+        return Notification._coll().count_documents({'user_id': user_oid, 'read': False})
 
     @staticmethod
-    def delete_old_notifications(days=30):
-        """Delete notifications older than specified days."""
+    def delete_old_notifications(days=RETENTION_DAYS):
+        """
+        Delete read notifications older than specified days.
+
+        The TTL index from create_indexes() already does this in the
+        background; this is only needed for a one-off manual cleanup.
+        """
         from datetime import timedelta
         cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-        result = mongo.db[Notification.COLLECTION].delete_many({
+        result = Notification._coll().delete_many({
             'created_at': {'$lt': cutoff_date},
             'read': True
         })
@@ -172,9 +282,26 @@ class Notification:
     @staticmethod
     def create_indexes():
         """Create database indexes for optimal performance."""
-        mongo.db[Notification.COLLECTION].create_index('user_id')
-        mongo.db[Notification.COLLECTION].create_index('read')
-        mongo.db[Notification.COLLECTION].create_index([('user_id', 1), ('read', 1), ('created_at', -1)])
+        coll = Notification._coll()
+        # 'user_id' is covered by the inbox index prefix; 'read' is too
+        # unselective to be worth its write cost
+        drop_indexes(coll, ['user_id_1', 'read_1'])
+
+        coll.create_indexes([
+            # Also serves single-field 'user_id' lookups via its prefix
+            IndexModel(USER_INBOX_INDEX),
+            IndexModel(
+                [('user_id', ASCENDING)],
+                name=UNREAD_INDEX_NAME,
+                partialFilterExpression={'read': False}
+            ),
+            # Expire read notifications; unread ones are kept
+            IndexModel(
+                [('created_at', ASCENDING)],
+                expireAfterSeconds=Notification.RETENTION_DAYS * 24 * 3600,
+                partialFilterExpression={'read': True}
+            )
+        ])
 
     @staticmethod
     def to_dict(notification):
@@ -4,8 +4,20 @@ Manages payment transactions and payouts.
 """
 
 from datetime import datetime
-from bson import ObjectId
-from app import mongo
+from pymongo import IndexModel, ASCENDING
+from app.utils.db import as_object_id, cached_collection, drop_indexes, to_object_id
+
+
+# Covers get_vendor_earnings (match fields plus the summed amount)
+EARNINGS_INDEX = [
+    ('vendor_id', ASCENDING),
+    ('status', ASCENDING),
+    ('payment_type', ASCENDING),
+    ('amount', ASCENDING)
+]
+
+# Reference fields stored as ObjectId; string values in filters are coerced
+_FILTER_ID_FIELDS = frozenset(('_id', 'booking_id', 'customer_id', 'vendor_id'))
 
 
 class Payment:
@@ -24,6 +36,11 @@ class Payment:
     TYPE_BOOKING = 'booking'
     TYPE_PAYOUT = 'payout'
     
+    @classmethod
+    def _coll(cls):
+        """Return the collection handle, cached per Mongo database."""
+        return cached_collection(cls)
+    
     @staticmethod
     def create(data):
         """
@@ -36,61 +53,87 @@ class Payment:
             str: Inserted payment ID
         """
         # Convert IDs to ObjectId
-        if 'booking_id' in data and isinstance(data['booking_id'], str):
-            data['booking_id'] = ObjectId(data['booking_id'])
-        if 'customer_id' in data and isinstance(data['customer_id'], str):
-            data['customer_id'] = ObjectId(data['customer_id'])
-        if 'vendor_id' in data and isinstance(data['vendor_id'], str):
-            data['vendor_id'] = ObjectId(data['vendor_id'])
+        if 'booking_id' in data:
+            data['booking_id'] = as_object_id(data['booking_id'])
+        if 'customer_id' in data:
+            data['customer_id'] = as_object_id(data['customer_id'])
+        if 'vendor_id' in data:
+            data['vendor_id'] = as_object_id(data['vendor_id'])
         
         # Set defaults
+        now = datetime.utcnow()
         data.setdefault('status', Payment.STATUS_PENDING)
         data.setdefault('payment_type', Payment.TYPE_BOOKING)
-        data.setdefault('created_at', datetime.utcnow())
-        data.setdefault('updated_at', datetime.utcnow())
+        data.setdefault('created_at', now)
+        data.setdefault('updated_at', now)
         
-        result = mongo.db[Payment.COLLECTION].insert_one(data)
+        result = Payment._coll().insert_one(data)
         return str(result.inserted_id)
     
     @staticmethod
     def find_by_id(payment_id):
         """Find payment by ID."""
-        try:
-            return mongo.db[Payment.COLLECTION].find_one({'_id': ObjectId(payment_id)})
-        except:
+        payment_oid = to_object_id(payment_id)
+        if payment_oid is None:
             return None
+        return Payment._coll().find_one({'_id': payment_oid})
     
     @staticmethod
     def find_by_booking(booking_id):
         """Find payment by booking ID."""
-        try:
-            booking_oid = ObjectId(booking_id)
-            return mongo.db[Payment.COLLECTION].find_one({'booking_id': booking_oid})
-        except:
+        booking_oid = to_object_id(booking_id)
+        if booking_oid is None:
             return None
+        return Payment._coll().find_one({'booking_id': booking_oid})
     
     @staticmethod
     def find_by_vendor(vendor_id, skip=0, limit=20):
         """Find all payments for a vendor."""
-        try:
-            vendor_oid = ObjectId(vendor_id)
-            return list(
-                mongo.db[Payment.COLLECTION]
-                .find({'vendor_id': vendor_oid})
-                .sort('created_at', -1)
-                .skip(skip)
-                .limit(limit)
-            )
-        except:
+        vendor_oid = to_object_id(vendor_id)
+        if vendor_oid is None:
             return []
+        return list(
+            Payment._coll()
+            .find({'vendor_id': vendor_oid})
+            .sort('created_at', -1)
+            .skip(skip)
+            .limit(limit)
+        )
+    
+    @staticmethod
+    def _coerce_filter_ids(filters):
+        """Convert string ID values in a query filter to ObjectId, in place."""
+        for key in _FILTER_ID_FIELDS & filters.keys():
+            value = filters[key]
+            if type(value) is str:
+                filters[key] = to_object_id(value) or value
+        return filters
+    
+    @staticmethod
+    def find_all(filters=None, skip=0, limit=20, projection=None):
+        """Find all payments with optional filters, newest first; ``limit=0`` returns every match."""
+        filters = Payment._coerce_filter_ids(dict(filters or {}))
+        return list(
+            Payment._coll()
+            .find(filters, projection)
+            .sort('created_at', -1)
+            .skip(skip)
+            .limit(limit)
+        )
+    
+    @staticmethod
+    def count(filters=None):
+        """Count payments matching filters."""
+        filters = Payment._coerce_filter_ids(dict(filters or {}))
+        return Payment._coll().count_documents(filters)
     
     @staticmethod
     def update(payment_id, data):
         """Update payment data."""
         data['updated_at'] = datetime.utcnow()
         
-        result = mongo.db[Payment.COLLECTION].update_one(
-            {'_id': ObjectId(payment_id)},
+        result = Payment._coll().update_one(
+            {'_id': as_object_id(payment_id)},
             {'$set': data}
         )
         return result.modified_count > 0
@@ -139,35 +182,40 @@ class Payment:
     
     @staticmethod
     def get_vendor_earnings(vendor_id):
-        """Calculate total earnings for a vendor."""
-        try:
-            vendor_oid = ObjectId(vendor_id)
-            pipeline = [
-                {
-                    '$match': {
-                        'vendor_id': vendor_oid,
-                        'status': Payment.STATUS_COMPLETED,
-                        'payment_type': Payment.TYPE_BOOKING
-                    }
-                },
-                {
-                    '$group': {
-                        '_id': None,
-                        'total': {'$sum': '$amount'}
-                    }
-                }
-            ]
-            
-            result = list(mongo.db[Payment.COLLECTION].aggregate(pipeline))
-            return result[0]['total'] if result else 0.0
-        except:
+        """
+        Calculate total earnings for a vendor.
+
+        The pipeline only touches fields in EARNINGS_INDEX, so it runs as an
+        index-only scan.
+        """
+        vendor_oid = to_object_id(vendor_id)
+        if vendor_oid is None:
             return 0.0
+        pipeline = [
+            {
+                '$match': {
+                    'vendor_id': vendor_oid,
+                    'status': Payment.STATUS_COMPLETED,
+                    'payment_type': Payment.TYPE_BOOKING
+                }
+            },
+            {'$project': {'_id': 0, 'amount': 1}},
+            {
+                '$group': {
+                    '_id': None,
+                    'total': {'$sum': '$amount'}
+                }
+            }
+        ]
+        
+        result = list(Payment._coll().aggregate(pipeline))
+        return result[0]['total'] if result else 0.0
     
     @staticmethod
     def find_pending_payouts():
         """Find all pending payout requests."""
         return list(
-            mongo.db[Payment.COLLECTION].find({
+            Payment._coll().find({
                 'payment_type': Payment.TYPE_PAYOUT,
                 'status': Payment.STATUS_PENDING
             })
@@ -176,12 +224,20 @@ class Payment:
     @staticmethod
     def create_indexes():
         """Create database indexes for optimal performance."""
-        mongo.db[Payment.COLLECTION].create_index('booking_id')
-        mongo.db[Payment.COLLECTION].create_index('customer_id')
-        mongo.db[Payment.COLLECTION].create_index('vendor_id')
-        mongo.db[Payment.COLLECTION].create_index('status')
-        mongo.db[Payment.COLLECTION].create_index('payment_type')
-        mongo.db[Payment.COLLECTION].create_index([('vendor_id', 1), ('status', 1)])
+        coll = Payment._coll()
+        # Covered by the (payment_type, status) and EARNINGS_INDEX prefixes
+        drop_indexes(coll, ['payment_type_1', 'vendor_id_1', 'vendor_id_1_status_1'])
+
+        coll.create_indexes([
+            IndexModel([('booking_id', ASCENDING)]),
+            IndexModel([('customer_id', ASCENDING)]),
+            IndexModel([('status', ASCENDING)]),
+            # Payout queues and revenue stats filter on both; also serves
+            # single-field 'payment_type' lookups via its prefix
+            IndexModel([('payment_type', ASCENDING), ('status', ASCENDING)]),
+            # Also serves 'vendor_id' and ('vendor_id', 'status') lookups via its prefix
+            IndexModel(EARNINGS_INDEX)
+        ])
     
     @staticmethod
     def to_dict(payment):
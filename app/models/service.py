@@ -3,10 +3,79 @@ Service model for HomeServe Pro.
 Manages available services and pricing.
 """
 
+import re
+import threading
 from datetime import datetime
+from functools import lru_cache
 from bson import ObjectId
-from app import mongo
+from bson.regex import Regex
+from pymongo import IndexModel, ASCENDING, TEXT
+from app.utils.db import STREAM_BATCH_SIZE, as_object_id, cached_collection, find_docs_by_ids, insert_many_unordered, to_object_id
 
+# Weighted text index used by search(); a collection can only have one
+SEARCH_INDEX_NAME = 'service_search'
+_LEGACY_TEXT_INDEX_NAME = 'name_text_description_text'
+_TEXT_SCORE = {'$meta': 'textScore'}
+
+# Projection for callers that only need to list or match services by name
+SUMMARY_PROJECTION = {'name': 1, 'category': 1, 'base_price': 1}
+
+# Catalogue listings with summary=True are answered from this index alone
+# (a covered query): every filtered and returned field is part of the key
+CATALOG_INDEX = [('active', ASCENDING), ('category', ASCENDING), ('name', ASCENDING), ('_id', ASCENDING)]
+COVERED_PROJECTION = {'_id': 1, 'name': 1, 'category': 1}
+
+try:
+    from cachetools import LRUCache, TTLCache
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+
+# In-process cache for catalogue reads, which change far less often than
+# they are fetched. Entries are keyed by _catalog_version, which every
+# service write bumps, so a write is visible to the next read in this
+# process; other processes see it once the TTL expires.
+CATALOG_CACHE_TTL = 60
+_catalog_cache = TTLCache(maxsize=256, ttl=CATALOG_CACHE_TTL) if CACHE_AVAILABLE else None
+_catalog_lock = threading.Lock()
+_catalog_version = 0
+_MISS = object()
+
+# Serialized services keyed by (_id, updated_at, fields present): every
+# service write stamps updated_at, so a changed document gets a new key
+_dict_cache = LRUCache(maxsize=1024) if CACHE_AVAILABLE else None
+
+
+def _cached(key, load):
+    """Return the cached result for ``key``, calling ``load`` on a miss."""
+    if _catalog_cache is None:
+        return load()
+    key = (_catalog_version,) + key
+    with _catalog_lock:
+        value = _catalog_cache.get(key, _MISS)
+    if value is _MISS:
+        value = load()
+        with _catalog_lock:
+            _catalog_cache[key] = value
+    return value
+
+
+def _invalidate_catalog():
+    """Make every cached catalogue read stale after a service write."""
+    global _catalog_version
+    with _catalog_lock:
+        _catalog_version += 1
+
+
+@lru_cache(maxsize=256)
+def _prefix_regex(prefix):
+    """Anchored, case-sensitive regex for a search prefix, built once per prefix."""
+    return Regex('^' + re.escape(prefix))
+
+
+def _projection_key(projection):
+    """Hashable form of a projection dict for use in cache keys."""
+    return tuple(sorted(projection.items())) if projection else None
 
 class Service:
     """Service model for available services."""
@@ -21,6 +90,18 @@ class Service:
     CATEGORY_CARPENTRY = 'carpentry'
     CATEGORY_APPLIANCE_REPAIR = 'appliance_repair'
 
+    @classmethod
+    def _coll(cls):
+        """Return the collection handle, cached per Mongo database."""
+        return cached_collection(cls)
+
+    @staticmethod
+    def _set_name_key(data):
+        """Store the lower-cased name used by prefix search, in place."""
+        if data.get('name'):
+            data['name_lower'] = data['name'].lower()
+        return data
+
     @staticmethod
     def create(data):
         """
@@ -32,75 +113,175 @@ class Service:
         Returns:
             str: Inserted service ID
         """
+        now = datetime.utcnow()
+        Service._set_name_key(data)
         data.setdefault('active', True)
-        data.setdefault('created_at', datetime.utcnow())
-        data.setdefault('updated_at', datetime.utcnow())
+        data.setdefault('created_at', now)
+        data.setdefault('updated_at', now)
 
-        result = mongo.db[Service.COLLECTION].insert_one(data)
+        result = Service._coll().insert_one(data)
+        _invalidate_catalog()
         return str(result.inserted_id)
 
+    @staticmethod
+    def bulk_create(docs):
+        """
+        Create several services with a single unordered insert.
+
+        Args:
+            docs (list): Service data dicts, as accepted by create()
+
+        Returns:
+            list: Inserted service IDs
+        """
+        now = datetime.utcnow()
+        for data in docs:
+            Service._set_name_key(data)
+            data.setdefault('active', True)
+            data.setdefault('created_at', now)
+            data.setdefault('updated_at', now)
+
+        ids = insert_many_unordered(Service._coll(), docs)
+        _invalidate_catalog()
+        return ids
+
     @staticmethod
     def find_by_id(service_id):
         """Find service by ID."""
-        try:
-            return mongo.db[Service.COLLECTION].find_one({'_id': ObjectId(service_id)})
-        except:
+        service_oid = to_object_id(service_id)
+        if service_oid is None:
             return None
+        return Service._coll().find_one({'_id': service_oid})
+
+    @staticmethod
+    def find_by_ids(ids):
+        """
+        Find several services by ID in one query.
+
+        Returns:
+            dict: Service documents keyed by string ID
+        """
+        return find_docs_by_ids(Service._coll(), ids)
 
     @staticmethod
     def find_by_name(name):
-        """Find service by name."""
-        return mongo.db[Service.COLLECTION].find_one({'name': name})
+        """Find service by name (cached; treat the result as read-only)."""
+        return _cached(('name', name), lambda: Service._coll().find_one({'name': name}))
+
+    @staticmethod
+    def find_by_names(names, projection=None):
+        """Find all services whose name is in the given list, optionally projected."""
+        return list(Service._coll().find({'name': {'$in': list(names)}}, projection))
+
+    @staticmethod
+    def _find_active(query, projection, summary):
+        """
+        Cursor over active services, sorted by category and name.
+
+        The sort follows CATALOG_INDEX, and with ``summary`` the projection is
+        covered by it too, so the planner can answer from the index alone.
+        """
+        query = dict(query, active=True)
+        if summary:
+            projection = COVERED_PROJECTION
+        return Service._coll().find(query, projection).sort([('category', ASCENDING), ('name', ASCENDING)])
 
     @staticmethod
-    def find_by_category(category):
-        """Find all services in a category."""
-        return list(mongo.db[Service.COLLECTION].find({'category': category, 'active': True}))
+    def find_by_category(category, projection=None, summary=False):
+        """
+        Find all active services in a category, optionally projected (e.g. SUMMARY_PROJECTION).
+
+        With ``summary=True`` only ``_id``, ``name`` and ``category`` are
+        returned, read from the index alone. Results are cached; treat the
+        returned documents as read-only.
+        """
+        return list(_cached(
+            ('category', category, summary, _projection_key(projection)),
+            lambda: list(Service._find_active({'category': category}, projection, summary))
+        ))
 
     @staticmethod
-    def find_all_active():
-        """Find all active services."""
-        return list(mongo.db[Service.COLLECTION].find({'active': True}))
+    def find_all_active(projection=None, summary=False):
+        """
+        Find all active services, optionally projected (e.g. SUMMARY_PROJECTION).
+
+        With ``summary=True`` only ``_id``, ``name`` and ``category`` are
+        returned, read from the index alone. Results are cached; treat the
+        returned documents as read-only.
+        """
+        return list(_cached(
+            ('active', summary, _projection_key(projection)),
+            lambda: list(Service.iter_all_active(projection, summary))
+        ))
+
     @staticmethod
-    def find_all():
-        """Find all services (any status)."""
-        return list(mongo.db[Service.COLLECTION].find({}))
+    def active_dicts():
+        """
+        Return every active service serialized with to_dict(), cached.
 
+        Shares the catalogue cache and its invalidation, so listings can skip
+        re-serializing on a hit. Treat the returned list as read-only.
+        """
+        return _cached(
+            ('active_dicts',),
+            lambda: [Service.to_dict(s) for s in Service.iter_all_active()]
+        )
 
+    @staticmethod
+    def iter_all_active(projection=None, summary=False):
+        """Stream active services in batches instead of loading them all at once."""
+        yield from Service._find_active({}, projection, summary).batch_size(STREAM_BATCH_SIZE)
+
+    @staticmethod
+    def find_all():
+        """Find all services (any status)."""
+        return list(Service._coll().find({}))
 
     @staticmethod
     def update(service_id, data):
         """Update service data."""
+        Service._set_name_key(data)
         data['updated_at'] = datetime.utcnow()
 
-        result = mongo.db[Service.COLLECTION].update_one(
-            {'_id': ObjectId(service_id)},
+        result = Service._coll().update_one(
+            {'_id': as_object_id(service_id)},
             {'$set': data}
         )
+        _invalidate_catalog()
         return result.modified_count > 0
 
     @staticmethod
-    def search(query, pincode=None):
+    def search(query, pincode=None, prefix=False):
         """
-        Search services by name or description.
+        Search active services by name, category or description.
+
+        Uses the text index, with results ordered by relevance. In prefix
+        mode, names starting with ``query`` are matched instead,
+        case-insensitively via the stored lower-cased name so the anchored
+        regex can use the b-tree index; categories, a closed set, must
+        match ``query`` exactly.
 
         Args:
             query (str): Search query
             pincode (str): Optional pincode for pricing
+            prefix (bool): Match name/category prefixes instead of words
 
         Returns:
             list: Matching services
         """
-        search_filter = {
-            'active': True,
-            '$or': [
-                {'name': {'$regex': query, '$options': 'i'}},
-                {'description': {'$regex': query, '$options': 'i'}},
-                {'category': {'$regex': query, '$options': 'i'}}
-            ]
-        }
+        if prefix:
+            query = query.lower()
+            return list(Service._coll().find({
+                'active': True,
+                '$or': [{'name_lower': _prefix_regex(query)}, {'category': query}]
+            }))
 
-        return list(mongo.db[Service.COLLECTION].find(search_filter))
+        return list(
+            Service._coll().find(
+                {'active': True, '$text': {'$search': query}},
+                {'score': _TEXT_SCORE}
+            ).sort([('score', _TEXT_SCORE)])
+        )
 
     @staticmethod
     def add_sub_service(service_id, sub_service):
@@ -108,21 +289,27 @@ class Service:
         # ensure an id for sub_service
         if '_id' not in sub_service:
             sub_service['_id'] = ObjectId()
+        now = datetime.utcnow()
         sub_service.setdefault('active', True)
-        sub_service.setdefault('created_at', datetime.utcnow())
-        result = mongo.db[Service.COLLECTION].update_one(
-            {'_id': ObjectId(service_id)},
-            {'$push': {'sub_services': sub_service}, '$set': {'updated_at': datetime.utcnow()}}
+        sub_service.setdefault('created_at', now)
+        result = Service._coll().update_one(
+            {'_id': as_object_id(service_id)},
+            {'$push': {'sub_services': sub_service}, '$set': {'updated_at': now}}
         )
+        _invalidate_catalog()
         return str(sub_service['_id']) if result.modified_count > 0 else None
 
     @staticmethod
     def remove_sub_service(service_id, sub_id):
         """Remove a sub-service by its id."""
-        result = mongo.db[Service.COLLECTION].update_one(
-            {'_id': ObjectId(service_id)},
-            {'$pull': {'sub_services': {'_id': ObjectId(sub_id)}}, '$set': {'updated_at': datetime.utcnow()}}
+        sub_oid = as_object_id(sub_id)
+        # Matching on the sub-service skips the write (and the updated_at
+        # touch) entirely when there is nothing to pull
+        result = Service._coll().update_one(
+            {'_id': as_object_id(service_id), 'sub_services._id': sub_oid},
+            {'$pull': {'sub_services': {'_id': sub_oid}}, '$set': {'updated_at': datetime.utcnow()}}
         )
+        _invalidate_catalog()
         return result.modified_count > 0
 
     @staticmethod
@@ -131,26 +318,70 @@ class Service:
         Example commission: {"type":"percent|fixed|hybrid","percent":10,"fixed":50,"cancellation_fee_percent":20}
         """
         commission = commission or {}
-        result = mongo.db[Service.COLLECTION].update_one(
-            {'_id': ObjectId(service_id)},
+        result = Service._coll().update_one(
+            {'_id': as_object_id(service_id)},
             {'$set': {'commission': commission, 'updated_at': datetime.utcnow()}}
         )
+        _invalidate_catalog()
         return result.modified_count > 0
 
+    @staticmethod
+    def backfill_name_lower():
+        """
+        Set 'name_lower' on services created before prefix search stored it.
+
+        Returns:
+            int: Number of services updated
+        """
+        result = Service._coll().update_many(
+            {'name_lower': {'$exists': False}},
+            [{'$set': {'name_lower': {'$toLower': '$name'}}}]
+        )
+        if result.modified_count:
+            _invalidate_catalog()
+        return result.modified_count
+
     @staticmethod
     def create_indexes():
         """Create database indexes for optimal performance."""
-        mongo.db[Service.COLLECTION].create_index('name', unique=True)
-        mongo.db[Service.COLLECTION].create_index('category')
-        mongo.db[Service.COLLECTION].create_index('active')
-        mongo.db[Service.COLLECTION].create_index([('name', 'text'), ('description', 'text')])
+        coll = Service._coll()
+        # Replace the old unweighted text index, which would block this one
+        if _LEGACY_TEXT_INDEX_NAME in coll.index_information():
+            coll.drop_index(_LEGACY_TEXT_INDEX_NAME)
+
+        coll.create_indexes([
+            IndexModel([('name', ASCENDING)], unique=True),
+            IndexModel([('name_lower', ASCENDING)]),
+            IndexModel([('category', ASCENDING)]),
+            # Also serves single-field 'active' lookups via its prefix
+            IndexModel(CATALOG_INDEX),
+            IndexModel(
+                [('name', TEXT), ('category', TEXT), ('description', TEXT)],
+                weights={'name': 10, 'category': 5, 'description': 1},
+                name=SEARCH_INDEX_NAME
+            )
+        ])
 
     @staticmethod
     def to_dict(service):
-        """Convert service document to dictionary."""
+        """
+        Convert service document to dictionary.
+
+        The result is memoised per document version. Callers get a fresh
+        top-level dict, but nested values (sub_services, commission) are
+        shared and must not be modified.
+        """
         if not service:
             return None
 
+        key = None
+        if _dict_cache is not None and service.get('updated_at'):
+            key = (service['_id'], service['updated_at'], frozenset(service))
+            with _catalog_lock:
+                cached = _dict_cache.get(key)
+            if cached is not None:
+                return dict(cached)
+
         # Normalize sub_services for output
         sub_services = []
         for s in service.get('sub_services', []) or []:
@@ -161,7 +392,7 @@ class Service:
                 'active': s.get('active', True)
             })
 
-        return {
+        result = {
             'id': str(service['_id']),
             'name': service.get('name'),
             'description': service.get('description'),
@@ -173,4 +404,9 @@ class Service:
             'sub_services': sub_services,
             'commission': service.get('commission', {})
         }
+        if key is not None:
+            with _catalog_lock:
+                _dict_cache[key] = result
+            return dict(result)
+        return result
 
@@ -4,9 +4,9 @@ Manages digital signatures with Smart Signature Vault.
 """
 
 from datetime import datetime
-from bson import ObjectId
+from pymongo import IndexModel, ASCENDING
 import hashlib
-from app import mongo
+from app.utils.db import as_object_id, cached_collection, to_object_id
 
 
 class Signature:
@@ -14,6 +14,11 @@ class Signature:
     
     COLLECTION = 'signatures'
     
+    @classmethod
+    def _coll(cls):
+        """Return the collection handle, cached per Mongo database."""
+        return cached_collection(cls)
+    
     @staticmethod
     def create(data):
         """
@@ -26,41 +31,42 @@ class Signature:
             str: Inserted signature ID
         """
         # Convert IDs to ObjectId
-        if 'booking_id' in data and isinstance(data['booking_id'], str):
-            data['booking_id'] = ObjectId(data['booking_id'])
-        if 'customer_id' in data and isinstance(data['customer_id'], str):
-            data['customer_id'] = ObjectId(data['customer_id'])
-        if 'vendor_id' in data and isinstance(data['vendor_id'], str):
-            data['vendor_id'] = ObjectId(data['vendor_id'])
+        if 'booking_id' in data:
+            data['booking_id'] = as_object_id(data['booking_id'])
+        if 'customer_id' in data:
+            data['customer_id'] = as_object_id(data['customer_id'])
+        if 'vendor_id' in data:
+            data['vendor_id'] = as_object_id(data['vendor_id'])
+        
+        now = datetime.utcnow()
         
         # Generate signature hash (SHA-256)
-        signature_content = f"{data['booking_id']}{data['customer_id']}{datetime.utcnow().isoformat()}"
+        signature_content = f"{data['booking_id']}{data['customer_id']}{now.isoformat()}"
         data['signature_hash'] = hashlib.sha256(signature_content.encode()).hexdigest()
         
         # Set defaults
         data.setdefault('verified', True)
-        data.setdefault('signed_at', datetime.utcnow())
-        data.setdefault('created_at', datetime.utcnow())
+        data.setdefault('signed_at', now)
+        data.setdefault('created_at', now)
         
-        result = mongo.db[Signature.COLLECTION].insert_one(data)
+        result = Signature._coll().insert_one(data)
         return str(result.inserted_id)
     
     @staticmethod
     def find_by_id(signature_id):
         """Find signature by ID."""
-        try:
-            return mongo.db[Signature.COLLECTION].find_one({'_id': ObjectId(signature_id)})
-        except:
+        signature_oid = to_object_id(signature_id)
+        if signature_oid is None:
             return None
+        return Signature._coll().find_one({'_id': signature_oid})
     
     @staticmethod
     def find_by_booking(booking_id):
         """Find signature by booking ID."""
-        try:
-            booking_oid = ObjectId(booking_id)
-            return mongo.db[Signature.COLLECTION].find_one({'booking_id': booking_oid})
-        except:
+        booking_oid = to_object_id(booking_id)
+        if booking_oid is None:
             return None
+        return Signature._coll().find_one({'booking_id': booking_oid})
     
     @staticmethod
     def verify_signature(signature_id, signature_hash):
@@ -95,22 +101,23 @@ class Signature:
         """
         # This is a placeholder for DocuSign integration
         # In production, this would call DocuSign API
+        now = datetime.utcnow()
         envelope_data = {
-            'envelope_id': f'env_{booking_id}_{datetime.utcnow().timestamp()}',
+            'envelope_id': f'env_{booking_id}_{now.timestamp()}',
             'signing_url': f'https://demo.docusign.net/signing/{booking_id}',
             'status': 'sent',
-            'created_at': datetime.utcnow()
+            'created_at': now
         }
         
         return envelope_data
     
     @staticmethod
-    def find_all(filters=None, skip=0, limit=20):
-        """Find all signatures with optional filters."""
+    def find_all(filters=None, skip=0, limit=20, projection=None):
+        """Find all signatures with optional filters and projection."""
         filters = filters or {}
         return list(
-            mongo.db[Signature.COLLECTION]
-            .find(filters)
+            Signature._coll()
+            .find(filters, projection)
             .sort('created_at', -1)
             .skip(skip)
             .limit(limit)
@@ -119,10 +126,12 @@ class Signature:
     @staticmethod
     def create_indexes():
         """Create database indexes for optimal performance."""
-        mongo.db[Signature.COLLECTION].create_index('booking_id', unique=True)
-        mongo.db[Signature.COLLECTION].create_index('customer_id')
-        mongo.db[Signature.COLLECTION].create_index('signature_hash', unique=True)
-        mongo.db[Signature.COLLECTION].create_index('signed_at')
+        Signature._coll().create_indexes([
+            IndexModel([('booking_id', ASCENDING)], unique=True),
+            IndexModel([('customer_id', ASCENDING)]),
+            IndexModel([('signature_hash', ASCENDING)], unique=True),
+            IndexModel([('signed_at', ASCENDING)])
+        ])
     
     @staticmethod
     def to_dict(signature):
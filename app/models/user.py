@@ -3,9 +3,44 @@ User model for HomeServe Pro.
 Handles customer, vendor, and admin user data.
 """
 
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from bson import ObjectId
-from app import mongo, bcrypt
+from flask import current_app
+from pymongo import IndexModel, ASCENDING
+from app import bcrypt
+from app.utils.db import as_object_id, cached_collection, drop_indexes, find_docs_by_ids, insert_many_unordered, to_object_id
+
+# Projection covering exactly the fields to_dict() returns (no password hash)
+SUMMARY_PROJECTION = dict.fromkeys((
+    'email', 'name', 'phone', 'role', 'pincode', 'address',
+    'verified', 'active', 'created_at', 'profile_image'
+), 1)
+
+try:
+    from cachetools import TTLCache
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+
+# Recent successful password checks, so repeated logins from one client do
+# not each pay for a bcrypt round. Entries are keyed by the stored hash, so
+# changing the password (which stores a new hash) retires them at once.
+# Passwords are keyed by an HMAC under a per-process random key, never
+# stored as-is.
+VERIFY_CACHE_TTL = 300
+_verify_cache = TTLCache(maxsize=4096, ttl=VERIFY_CACHE_TTL) if CACHE_AVAILABLE else None
+_verify_lock = threading.Lock()
+_verify_key = os.urandom(32)
+
+
+def _verify_cache_key(user, password):
+    """Build the verification cache key for a user and candidate password."""
+    digest = hmac.new(_verify_key, password.encode('utf-8'), hashlib.sha256).digest()
+    return (str(user['_id']), user['password'], digest)
 
 
 class User:
@@ -28,51 +63,161 @@ class User:
         ROLE_SUPER_ADMIN
     ]
     
+    # Worker threads used to hash passwords in bulk_create
+    BULK_HASH_WORKERS = 4
+    
+    @classmethod
+    def _coll(cls):
+        """Return the collection handle, cached per Mongo database."""
+        return cached_collection(cls)
+    
+    @staticmethod
+    def _hash_password(password):
+        """Return the bcrypt hash of a plain text password."""
+        return bcrypt.generate_password_hash(password).decode('utf-8')
+    
+    @staticmethod
+    def normalize_email(email):
+        """Return the stored form of an email address (trimmed, lower-case)."""
+        return email.strip().lower()
+    
+    @staticmethod
+    def _prepare(data, hash_password=True):
+        """Hash the password, apply defaults and validate a new user document."""
+        # Hash password
+        if hash_password and 'password' in data:
+            data['password'] = User._hash_password(data['password'])
+        
+        # Emails are stored normalized so lookups are plain equality matches
+        if data.get('email'):
+            data['email'] = User.normalize_email(data['email'])
+        
+        # Set defaults
+        now = datetime.utcnow()
+        data.setdefault('verified', False)
+        data.setdefault('active', True)
+        data.setdefault('created_at', now)
+        data.setdefault('updated_at', now)
+        
+        # Validate role
+        if data.get('role') not in User.VALID_ROLES:
+            raise ValueError(f"Invalid role. Must be one of {User.VALID_ROLES}")
+        
+        return data
+    
     @staticmethod
-    def create(data):
+    def create(data, session=None):
         """
         Create a new user.
         
         Args:
             data (dict): User data including email, password, role, etc.
+            session: Optional ClientSession to run the insert in
             
         Returns:
             str: Inserted user ID
         """
-        # Hash password
-        if 'password' in data:
-            data['password'] = bcrypt.generate_password_hash(data['password']).decode('utf-8')
+        User._prepare(data)
         
-        # Set defaults
-        data.setdefault('verified', False)
-        data.setdefault('active', True)
-        data.setdefault('created_at', datetime.utcnow())
-        data.setdefault('updated_at', datetime.utcnow())
+        result = User._coll().insert_one(data, session=session)
+        return str(result.inserted_id)
+    
+    @staticmethod
+    def bulk_create(docs):
+        """
+        Create several users with a single unordered insert.
         
-        # Validate role
-        if data.get('role') not in User.VALID_ROLES:
-            raise ValueError(f"Invalid role. Must be one of {User.VALID_ROLES}")
+        A duplicate (e.g. an email that already exists) only skips that
+        document; the rest of the batch is still inserted.
         
-        result = mongo.db[User.COLLECTION].insert_one(data)
-        return str(result.inserted_id)
+        Args:
+            docs (list): User data dicts, as accepted by create()
+            
+        Returns:
+            list: Inserted user IDs
+        """
+        # bcrypt releases the GIL, so hashing in threads uses several cores
+        with_password = [data for data in docs if 'password' in data]
+        if with_password:
+            with ThreadPoolExecutor(max_workers=User.BULK_HASH_WORKERS) as executor:
+                hashes = list(executor.map(
+                    User._hash_password, [data['password'] for data in with_password]
+                ))
+            for data, hashed in zip(with_password, hashes):
+                data['password'] = hashed
+        
+        for data in docs:
+            User._prepare(data, hash_password=False)
+        
+        return insert_many_unordered(User._coll(), docs)
     
     @staticmethod
-    def find_by_id(user_id):
-        """Find user by ID."""
-        try:
-            return mongo.db[User.COLLECTION].find_one({'_id': ObjectId(user_id)})
-        except:
+    def find_by_id(user_id, projection=None):
+        """
+        Find user by ID.
+
+        Args:
+            user_id (str): User ID
+            projection (dict): Fields to return, e.g. SUMMARY_PROJECTION
+
+        Returns:
+            dict: User document or None
+        """
+        user_oid = to_object_id(user_id)
+        if user_oid is None:
             return None
+        return User._coll().find_one({'_id': user_oid}, projection)
+    
+    @staticmethod
+    def find_by_ids(ids, projection=None):
+        """
+        Find several users by ID in one query.
+
+        Args:
+            ids (iterable): User IDs
+            projection (dict): Fields to return, e.g. SUMMARY_PROJECTION
+
+        Returns:
+            dict: User documents keyed by string ID
+        """
+        return find_docs_by_ids(User._coll(), ids, projection)
     
     @staticmethod
     def find_by_email(email):
         """Find user by email."""
-        return mongo.db[User.COLLECTION].find_one({'email': email.lower()})
+        return User._coll().find_one({'email': User.normalize_email(email)})
+    
+    @staticmethod
+    def find_by_emails(emails):
+        """Find all users whose email is in the given list."""
+        return list(User._coll().find(
+            {'email': {'$in': [User.normalize_email(email) for email in emails]}}
+        ))
     
     @staticmethod
     def find_by_phone(phone):
         """Find user by phone number."""
-        return mongo.db[User.COLLECTION].find_one({'phone': phone})
+        return User._coll().find_one({'phone': phone})
+    
+    @staticmethod
+    def find_by_email_or_phone(email, phone):
+        """
+        Find a user registered with either the email or the phone number.
+
+        Both fields are indexed, so one $or query answers both duplicate
+        checks in a single round trip.
+
+        Args:
+            email (str): Email address
+            phone (str): Phone number
+
+        Returns:
+            dict: ``_id``, ``email`` and ``phone`` of a matching user, or None
+        """
+        return User._coll().find_one(
+            {'$or': [{'email': User.normalize_email(email)}, {'phone': phone}]},
+            {'email': 1, 'phone': 1}
+        )
     
     @staticmethod
     def update(user_id, data):
@@ -88,12 +233,15 @@ class User:
         """
         data['updated_at'] = datetime.utcnow()
         
+        if data.get('email'):
+            data['email'] = User.normalize_email(data['email'])
+        
         # Hash password if being updated
         if 'password' in data:
-            data['password'] = bcrypt.generate_password_hash(data['password']).decode('utf-8')
+            data['password'] = User._hash_password(data['password'])
         
-        result = mongo.db[User.COLLECTION].update_one(
-            {'_id': ObjectId(user_id)},
+        result = User._coll().update_one(
+            {'_id': as_object_id(user_id)},
             {'$set': data}
         )
         return result.modified_count > 0
@@ -114,11 +262,34 @@ class User:
             
         Returns:
             bool: True if password matches
+        
+        A matching hash made with a lower cost factor than
+        BCRYPT_LOG_ROUNDS is replaced with a rehash at the current cost.
+        Successful checks are cached for VERIFY_CACHE_TTL seconds.
         """
-        return bcrypt.check_password_hash(user['password'], password)
+        stored_hash = user['password']
+        if _verify_cache is not None:
+            key = _verify_cache_key(user, password)
+            with _verify_lock:
+                if key in _verify_cache:
+                    return True
+        
+        if not bcrypt.check_password_hash(stored_hash, password):
+            return False
+        
+        # bcrypt hashes look like $2b$<cost>$<salt+hash>
+        if int(stored_hash.split('$')[2]) < current_app.config['BCRYPT_LOG_ROUNDS']:
+            User._coll().update_one(
+                {'_id': user['_id'], 'password': stored_hash},
+                {'$set': {'password': User._hash_password(password)}}
+            )
+        elif _verify_cache is not None:
+            with _verify_lock:
+                _verify_cache[key] = True
+        return True
     
     @staticmethod
-    def find_all(filters=None, skip=0, limit=20):
+    def find_all(filters=None, skip=0, limit=20, projection=None):
         """
         Find all users with optional filters.
         
@@ -126,27 +297,33 @@ class User:
             filters (dict): MongoDB query filters
             skip (int): Number of documents to skip
             limit (int): Maximum number of documents to return
+            projection (dict): Fields to return, e.g. SUMMARY_PROJECTION
             
         Returns:
             list: List of user documents
         """
         filters = filters or {}
-        return list(mongo.db[User.COLLECTION].find(filters).skip(skip).limit(limit))
+        return list(User._coll().find(filters, projection).skip(skip).limit(limit))
     
     @staticmethod
     def count(filters=None):
         """Count users matching filters."""
         filters = filters or {}
-        return mongo.db[User.COLLECTION].count_documents(filters)
+        return User._coll().count_documents(filters)
     
     @staticmethod
     def create_indexes():
         """Create database indexes for optimal performance."""
-        mongo.db[User.COLLECTION].create_index('email', unique=True)
-        mongo.db[User.COLLECTION].create_index('phone')
-        mongo.db[User.COLLECTION].create_index('role')
-        mongo.db[User.COLLECTION].create_index('pincode')
-        mongo.db[User.COLLECTION].create_index([('email', 1), ('role', 1)])
+        coll = User._coll()
+        # The unique 'email' index already pins a single document
+        drop_indexes(coll, ['email_1_role_1'])
+
+        coll.create_indexes([
+            IndexModel([('email', ASCENDING)], unique=True),
+            IndexModel([('phone', ASCENDING)]),
+            IndexModel([('role', ASCENDING)]),
+            IndexModel([('pincode', ASCENDING)])
+        ])
     
     @staticmethod
     def to_dict(user):
@@ -3,9 +3,40 @@ Vendor model for HomeServe Pro.
 Manages vendor-specific data and operations.
 """
 
-from datetime import datetime
-from bson import ObjectId
-from app import mongo
+from pymongo import IndexModel, ReturnDocument, ASCENDING, DESCENDING
+from app.utils.db import STREAM_BATCH_SIZE, as_object_id, cached_collection, drop_indexes, find_docs_by_ids, insert_many_unordered, to_object_id, utcnow
+
+# Projection covering exactly the fields to_dict() returns; leaves out the
+# registration-only data (portfolio, working hours, business details, ...)
+SUMMARY_PROJECTION = dict.fromkeys((
+    'user_id', 'name', 'services', 'pincodes', 'availability', 'onboarding_status',
+    'kyc_docs', 'ratings', 'ratings_sum', 'total_ratings', 'earnings', 'completed_jobs',
+    'created_at', 'profile_image', 'is_approved', 'documents_verified',
+    'payouts_enabled', 'verification_docs', 'rejection_reason', 'phone',
+    'email', 'address', 'bank_details'
+), 1)
+
+# Projection for vendor cards and auto-assignment: identity, coverage and
+# the fields vendors are ranked by
+LIST_PROJECTION = dict.fromkeys((
+    'user_id', 'name', 'services', 'pincodes', 'availability', 'onboarding_status',
+    'ratings', 'ratings_sum', 'total_ratings', 'completed_jobs', 'profile_image'
+), 1)
+
+
+# Fields copied by to_dict() with their defaults when missing; containers
+# get a fresh empty value per document so callers can mutate the result
+_TO_DICT_FIELDS = (
+    ('name', None), ('availability', False), ('onboarding_status', None),
+    ('total_ratings', 0), ('earnings', 0.0), ('completed_jobs', 0),
+    ('created_at', None), ('profile_image', None), ('is_approved', False),
+    ('documents_verified', False), ('payouts_enabled', False),
+    ('rejection_reason', ''), ('phone', ''), ('email', ''), ('address', '')
+)
+_TO_DICT_CONTAINERS = (
+    ('services', list), ('pincodes', list), ('kyc_docs', list),
+    ('verification_docs', list), ('bank_details', dict)
+)
 
 
 class Vendor:
@@ -43,88 +74,129 @@ class Vendor:
 
     VALID_BUSINESS_TYPES = [BUSINESS_TYPE_INDIVIDUAL, BUSINESS_TYPE_PARTNERSHIP,
                            BUSINESS_TYPE_COMPANY, BUSINESS_TYPE_FREELANCER]
+
+    # Defaults filled in by _prepare() for fields missing from a new vendor;
+    # containers are built by their factory so documents never share one
+    _DEFAULTS = {
+        'onboarding_status': STATUS_INCOMPLETE,
+        'availability': False,
+        'ratings_sum': 0.0,
+        'total_ratings': 0,
+        'earnings': 0.0,
+        'completed_jobs': 0,
+        # New fields for enhanced onboarding
+        'is_approved': False,
+        'documents_verified': False,
+        'payouts_enabled': False,
+        # Registration data
+        'business_type': BUSINESS_TYPE_INDIVIDUAL,
+        'business_name': '',
+        'business_address': '',
+        'business_registration_number': '',
+        'tax_id': '',
+        'experience_years': 0,
+        'profile_image': '',
+        'registration_step': 1,  # Track registration progress
+        'verification_notes': '',
+        'rejection_reason': ''
+    }
+    _CONTAINER_DEFAULTS = {
+        'services': list, 'kyc_docs': list, 'verification_docs': list,
+        'pincodes': list, 'service_areas': list, 'specializations': list,
+        'languages': list, 'portfolio_images': list,
+        'working_hours': dict, 'emergency_contact': dict, 'bank_details': dict
+    }
+    
+    @classmethod
+    def _coll(cls):
+        """Return the collection handle, cached per Mongo database."""
+        return cached_collection(cls)
     
     @staticmethod
-    def create(data):
+    def _prepare(data, now=None):
+        """Coerce IDs and fill defaults on a new vendor document, in place."""
+        # Convert user_id to ObjectId if string
+        if 'user_id' in data:
+            data['user_id'] = as_object_id(data['user_id'])
+        
+        # Set defaults for missing fields
+        now = now or utcnow()
+        data.update({key: value for key, value in Vendor._DEFAULTS.items() if key not in data})
+        data.update({key: factory() for key, factory in Vendor._CONTAINER_DEFAULTS.items()
+                     if key not in data})
+        data.setdefault('created_at', now)
+        data.setdefault('updated_at', now)
+        return data
+    
+    @staticmethod
+    def create(data, session=None):
         """
         Create a new vendor profile.
         
         Args:
             data (dict): Vendor data
+            session: Optional ClientSession to run the insert in
             
         Returns:
             str: Inserted vendor ID
         """
-        # Convert user_id to ObjectId if string
-        if 'user_id' in data and isinstance(data['user_id'], str):
-            data['user_id'] = ObjectId(data['user_id'])
-        
-        # Set defaults for basic vendor data
-        data.setdefault('onboarding_status', Vendor.STATUS_INCOMPLETE)
-        data.setdefault('availability', False)
-        data.setdefault('services', [])
-        data.setdefault('kyc_docs', [])
-        data.setdefault('ratings', 0.0)
-        data.setdefault('total_ratings', 0)
-        data.setdefault('earnings', 0.0)
-        data.setdefault('completed_jobs', 0)
-        data.setdefault('created_at', datetime.utcnow())
-        data.setdefault('updated_at', datetime.utcnow())
-
-        # New fields for enhanced onboarding
-        data.setdefault('is_approved', False)
-        data.setdefault('documents_verified', False)
-        data.setdefault('payouts_enabled', False)
-        data.setdefault('verification_docs', [])
-
-        # Set defaults for registration data
-        data.setdefault('business_type', Vendor.BUSINESS_TYPE_INDIVIDUAL)
-        data.setdefault('business_name', '')
-        data.setdefault('business_address', '')
-        data.setdefault('business_registration_number', '')
-        data.setdefault('tax_id', '')
-        data.setdefault('pincodes', [])
-        data.setdefault('service_areas', [])
-        data.setdefault('experience_years', 0)
-        data.setdefault('specializations', [])
-        data.setdefault('languages', [])
-        data.setdefault('working_hours', {})
-        data.setdefault('emergency_contact', {})
-        data.setdefault('bank_details', {})
-        data.setdefault('profile_image', '')
-        data.setdefault('portfolio_images', [])
-        data.setdefault('registration_step', 1)  # Track registration progress
-        data.setdefault('verification_notes', '')
-        data.setdefault('rejection_reason', '')
+        Vendor._prepare(data)
         
-        result = mongo.db[Vendor.COLLECTION].insert_one(data)
+        result = Vendor._coll().insert_one(data, session=session)
         return str(result.inserted_id)
     
+    @staticmethod
+    def bulk_create(docs):
+        """
+        Create several vendor profiles with a single unordered insert.
+        
+        Args:
+            docs (list): Vendor data dicts, as accepted by create()
+            
+        Returns:
+            list: Inserted vendor IDs
+        """
+        now = utcnow()
+        for data in docs:
+            Vendor._prepare(data, now)
+        
+        return insert_many_unordered(Vendor._coll(), docs)
+    
     @staticmethod
     def find_by_id(vendor_id):
         """Find vendor by ID."""
-        try:
-            return mongo.db[Vendor.COLLECTION].find_one({'_id': ObjectId(vendor_id)})
-        except:
+        vendor_oid = to_object_id(vendor_id)
+        if vendor_oid is None:
             return None
+        return Vendor._coll().find_one({'_id': vendor_oid})
+    
+    @staticmethod
+    def find_by_ids(ids):
+        """
+        Find several vendors by ID in one query.
+
+        Returns:
+            dict: Vendor documents keyed by string ID
+        """
+        return find_docs_by_ids(Vendor._coll(), ids)
     
     @staticmethod
     def find_by_user_id(user_id):
         """Find vendor by user ID."""
-        try:
-            user_oid = ObjectId(user_id)
-            return mongo.db[Vendor.COLLECTION].find_one({'user_id': user_oid})
-        except:
+        user_oid = to_object_id(user_id)
+        if user_oid is None:
             return None
+        return Vendor._coll().find_one({'user_id': user_oid})
     
     @staticmethod
-    def find_available_by_service(service_name, pincode=None):
+    def find_available_by_service(service_name, pincode=None, projection=None):
         """
         Find available vendors for a specific service.
         
         Args:
             service_name (str): Service name
             pincode (str): Optional pincode filter
+            projection (dict): Fields to return, e.g. SUMMARY_PROJECTION
             
         Returns:
             list: List of available vendors
@@ -138,7 +210,7 @@ class Vendor:
         if pincode:
             query['pincodes'] = pincode
         
-        return list(mongo.db[Vendor.COLLECTION].find(query))
+        return list(Vendor._coll().find(query, projection))
     
     @staticmethod
     def update(vendor_id, data):
@@ -152,57 +224,88 @@ class Vendor:
         Returns:
             bool: True if updated successfully
         """
-        data['updated_at'] = datetime.utcnow()
+        # updated_at is stamped server-side via $currentDate
+        data.pop('updated_at', None)
         
-        result = mongo.db[Vendor.COLLECTION].update_one(
-            {'_id': ObjectId(vendor_id)},
-            {'$set': data}
-        )
+        update = {'$currentDate': {'updated_at': True}}
+        if data:
+            update['$set'] = data
+        result = Vendor._coll().update_one({'_id': as_object_id(vendor_id)}, update)
         return result.modified_count > 0
     
     @staticmethod
     def toggle_availability(vendor_id):
-        """Toggle vendor availability status."""
-        vendor = Vendor.find_by_id(vendor_id)
-        if not vendor:
-            return False
+        """
+        Toggle vendor availability status in one atomic pipeline update.
         
-        new_status = not vendor.get('availability', False)
-        return Vendor.update(vendor_id, {'availability': new_status})
+        Returns:
+            dict: Updated vendor document, or None if not found
+        """
+        return Vendor._coll().find_one_and_update(
+            {'_id': as_object_id(vendor_id)},
+            [{'$set': {'availability': {'$not': '$availability'}, 'updated_at': '$$NOW'}}],
+            return_document=ReturnDocument.AFTER
+        )
     
     @staticmethod
     def update_rating(vendor_id, new_rating):
         """
         Update vendor rating with new rating.
         
+        Only the running sum and count are stored; the average is derived
+        on read by average_rating().
+        
         Args:
             vendor_id (str): Vendor ID
             new_rating (float): New rating (1-5)
         """
-        vendor = Vendor.find_by_id(vendor_id)
-        if not vendor:
-            return False
-        
-        total_ratings = vendor.get('total_ratings', 0)
-        current_rating = vendor.get('ratings', 0.0)
+        vendor_oid = as_object_id(vendor_id)
+        result = Vendor._coll().update_one(
+            {'_id': vendor_oid, 'ratings_sum': {'$exists': True}},
+            {
+                '$inc': {'ratings_sum': new_rating, 'total_ratings': 1},
+                '$currentDate': {'updated_at': True}
+            }
+        )
+        if result.matched_count:
+            return result.modified_count > 0
         
-        # Calculate new average rating
-        new_total = total_ratings + 1
-        new_avg = ((current_rating * total_ratings) + new_rating) / new_total
+        # Vendors created before ratings_sum existed only have the stored
+        # average: seed the sum from it once
+        total_ratings = {'$ifNull': ['$total_ratings', 0]}
+        result = Vendor._coll().update_one(
+            {'_id': vendor_oid, 'ratings_sum': {'$exists': False}},
+            [{'$set': {
+                'ratings_sum': {'$add': [
+                    {'$multiply': [{'$ifNull': ['$ratings', 0.0]}, total_ratings]},
+                    new_rating
+                ]},
+                'total_ratings': {'$add': [total_ratings, 1]},
+                'updated_at': '$$NOW'
+            }}]
+        )
+        return result.modified_count > 0
+    
+    @staticmethod
+    def average_rating(vendor):
+        """
+        Return a vendor document's average rating, rounded to 2 places.
         
-        return Vendor.update(vendor_id, {
-            'ratings': round(new_avg, 2),
-            'total_ratings': new_total
-        })
+        Falls back to the stored ``ratings`` average for vendors that have
+        not been rated since ratings_sum was introduced.
+        """
+        if 'ratings_sum' not in vendor:
+            return vendor.get('ratings', 0.0)
+        return round(vendor['ratings_sum'] / max(vendor.get('total_ratings', 0), 1), 2)
     
     @staticmethod
     def add_earnings(vendor_id, amount):
         """Add earnings to vendor account."""
-        result = mongo.db[Vendor.COLLECTION].update_one(
-            {'_id': ObjectId(vendor_id)},
+        result = Vendor._coll().update_one(
+            {'_id': as_object_id(vendor_id)},
             {
                 '$inc': {'earnings': amount, 'completed_jobs': 1},
-                '$set': {'updated_at': datetime.utcnow()}
+                '$currentDate': {'updated_at': True}
             }
         )
         return result.modified_count > 0
@@ -213,25 +316,25 @@ class Vendor:
         doc = {
             'url': doc_url,
             'type': doc_type,
-            'uploaded_at': datetime.utcnow()
+            'uploaded_at': utcnow()
         }
         
-        result = mongo.db[Vendor.COLLECTION].update_one(
-            {'_id': ObjectId(vendor_id)},
+        result = Vendor._coll().update_one(
+            {'_id': as_object_id(vendor_id)},
             {
                 '$push': {'kyc_docs': doc},
-                '$set': {'updated_at': datetime.utcnow()}
+                '$currentDate': {'updated_at': True}
             }
         )
         return result.modified_count > 0
     
     @staticmethod
-    def find_all(filters=None, skip=0, limit=20):
-        """Find all vendors with optional filters."""
+    def find_all(filters=None, skip=0, limit=20, projection=None):
+        """Find all vendors with optional filters and projection (e.g. SUMMARY_PROJECTION)."""
         filters = filters or {}
         return list(
-            mongo.db[Vendor.COLLECTION]
-            .find(filters)
+            Vendor._coll()
+            .find(filters, projection)
             .sort('created_at', -1)
             .skip(skip)
             .limit(limit)
@@ -239,28 +342,54 @@ class Vendor:
     
     @staticmethod
     def count(filters=None):
-        """Count vendors matching filters."""
-        filters = filters or {}
-        return mongo.db[Vendor.COLLECTION].count_documents(filters)
+        """
+        Count vendors matching filters.
+
+        With no filters the collection metadata estimate is returned; pass
+        ``{}`` explicitly for an exact total.
+        """
+        if filters is None:
+            return Vendor._coll().estimated_document_count()
+        return Vendor._coll().count_documents(filters)
     
     @staticmethod
     def find_pending_onboarding():
         """Find vendors pending onboarding approval."""
-        return list(
-            mongo.db[Vendor.COLLECTION].find({
-                'onboarding_status': Vendor.STATUS_PENDING
-            })
-        )
+        return list(Vendor.iter_pending_onboarding())
+    
+    @staticmethod
+    def iter_pending_onboarding():
+        """Stream vendors pending onboarding approval in batches."""
+        yield from Vendor._coll().find({
+            'onboarding_status': Vendor.STATUS_PENDING
+        }).batch_size(STREAM_BATCH_SIZE)
     
     @staticmethod
     def create_indexes():
         """Create database indexes for optimal performance."""
-        mongo.db[Vendor.COLLECTION].create_index('user_id', unique=True)
-        mongo.db[Vendor.COLLECTION].create_index('onboarding_status')
-        mongo.db[Vendor.COLLECTION].create_index('availability')
-        mongo.db[Vendor.COLLECTION].create_index('services')
-        mongo.db[Vendor.COLLECTION].create_index('pincodes')
-        mongo.db[Vendor.COLLECTION].create_index([('availability', 1), ('ratings', -1)])
+        coll = Vendor._coll()
+        # 'ratings' is no longer stored on vendors, and 'onboarding_status_1'
+        # is covered by the compound index below
+        drop_indexes(coll, ['availability_1_ratings_-1', 'onboarding_status_1'])
+
+        coll.create_indexes([
+            IndexModel([('user_id', ASCENDING)], unique=True),
+            # Status-filtered, newest-first pages (find_all, pending onboarding);
+            # also serves single-field 'onboarding_status' lookups via its prefix
+            IndexModel([('onboarding_status', ASCENDING), ('created_at', DESCENDING)]),
+            IndexModel([('services', ASCENDING)]),
+            # find_available_by_service: only approved, available vendors are
+            # indexed. pincodes cannot join this key, since a compound index
+            # may hold at most one array field
+            IndexModel(
+                [('services', ASCENDING)],
+                partialFilterExpression={'availability': True, 'onboarding_status': Vendor.STATUS_APPROVED},
+                name='available_by_service'
+            ),
+            IndexModel([('pincodes', ASCENDING)]),
+            # Admin/catalogue 'availability' filters
+            IndexModel([('availability', ASCENDING)])
+        ])
     
     @staticmethod
     def to_dict(vendor):
@@ -268,31 +397,12 @@ class Vendor:
         if not vendor:
             return None
         
-        return {
-            'id': str(vendor['_id']),
-            'user_id': str(vendor.get('user_id')),
-            'name': vendor.get('name'),
-            'services': vendor.get('services', []),
-            'pincodes': vendor.get('pincodes', []),
-            'availability': vendor.get('availability', False),
-            'onboarding_status': vendor.get('onboarding_status'),
-            'kyc_docs': vendor.get('kyc_docs', []),
-            'ratings': vendor.get('ratings', 0.0),
-            'total_ratings': vendor.get('total_ratings', 0),
-            'earnings': vendor.get('earnings', 0.0),
-            'completed_jobs': vendor.get('completed_jobs', 0),
-            'created_at': vendor.get('created_at'),
-            'profile_image': vendor.get('profile_image'),
-            'is_approved': vendor.get('is_approved', False),
-            'documents_verified': vendor.get('documents_verified', False),
-            'payouts_enabled': vendor.get('payouts_enabled', False),
-            'verification_docs': vendor.get('verification_docs', []),
-            'rejection_reason': vendor.get('rejection_reason', ''),
-            'phone': vendor.get('phone', ''),
-            'email': vendor.get('email', ''),
-            'address': vendor.get('address', ''),
-            'bank_details': vendor.get('bank_details', {})
-        }
+        data = {'id': str(vendor['_id']), 'user_id': str(vendor.get('user_id'))}
+        data.update({key: vendor.get(key, default) for key, default in _TO_DICT_FIELDS})
+        data.update({key: vendor[key] if key in vendor else factory()
+                     for key, factory in _TO_DICT_CONTAINERS})
+        data['ratings'] = Vendor.average_rating(vendor)
+        return data
 
     @staticmethod
     def update_registration_step(vendor_id, step, data=None):
@@ -307,17 +417,13 @@ class Vendor:
         Returns:
             bool: True if updated successfully
         """
-        update_data = {
-            'registration_step': step,
-            'updated_at': datetime.utcnow()
-        }
+        update_data = dict(data) if data else {}
+        update_data['registration_step'] = step
+        update_data.pop('updated_at', None)
 
-        if data:
-            update_data.update(data)
-
-        result = mongo.db[Vendor.COLLECTION].update_one(
-            {'_id': ObjectId(vendor_id)},
-            {'$set': update_data}
+        result = Vendor._coll().update_one(
+            {'_id': as_object_id(vendor_id)},
+            {'$set': update_data, '$currentDate': {'updated_at': True}}
         )
         return result.modified_count > 0
 
@@ -332,14 +438,14 @@ class Vendor:
         Returns:
             bool: True if updated successfully
         """
-        result = mongo.db[Vendor.COLLECTION].update_one(
-            {'_id': ObjectId(vendor_id)},
+        result = Vendor._coll().update_one(
+            {'_id': as_object_id(vendor_id)},
             {
                 '$set': {
                     'onboarding_status': Vendor.STATUS_PENDING,
-                    'registration_step': 6,  # Registration complete
-                    'updated_at': datetime.utcnow()
-                }
+                    'registration_step': 6  # Registration complete
+                },
+                '$currentDate': {'updated_at': True}
             }
         )
         return result.modified_count > 0
@@ -355,7 +461,16 @@ class Vendor:
         Returns:
             dict: Registration progress information
         """
-        vendor = Vendor.find_by_id(vendor_id)
+        vendor_oid = to_object_id(vendor_id)
+        if vendor_oid is None:
+            return None
+        # The step checks only need to know whether services has an entry
+        # and kyc_docs has two, so the arrays are sliced to that length
+        vendor = Vendor._coll().find_one({'_id': vendor_oid}, {
+            'name': 1, 'business_type': 1, 'bank_details.account_number': 1,
+            'registration_step': 1, 'onboarding_status': 1,
+            'services': {'$slice': 1}, 'kyc_docs': {'$slice': 2}
+        })
         if not vendor:
             return None
 
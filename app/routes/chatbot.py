@@ -3,19 +3,132 @@ Chatbot API Routes
 Provides endpoints for AI chatbot interactions
 """
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_current_user, get_jwt_identity
 
 from app.services.chatbot_service import ChatbotService, ai_chatbot
 from app.utils.decorators import role_required
 from app.utils.error_handlers import api_error_response, api_success_response
-from app.models.user import User
 from app.models.booking import Booking
 from app.models.service import Service
 
 chatbot_bp = Blueprint('chatbot', __name__, url_prefix='/api/chatbot')
 
 
+# Role-specific suggested questions
+ROLE_SUGGESTIONS = {
+    'customer': [
+        "What's my booking status?",
+        "Book a plumbing service",
+        "Show my payment history",
+        "How do I sign a document?",
+        "Rate my last service",
+        "View available services"
+    ],
+    'vendor': [
+        "Show my pending jobs",
+        "What are my earnings?",
+        "Toggle my availability",
+        "How do I upload photos?",
+        "Request customer signature",
+        "View my performance stats"
+    ],
+    'onboard_manager': [
+        "Show pending vendor applications",
+        "How do I approve a vendor?",
+        "Search for a vendor",
+        "View onboarding statistics",
+        "Review KYC documents"
+    ],
+    'ops_manager': [
+        "Show live operations",
+        "Pending signatures",
+        "Approve payments",
+        "View operational alerts",
+        "Monitor booking trends"
+    ],
+    'super_admin': [
+        "Show system analytics",
+        "Manage users",
+        "View service catalog",
+        "Approve payouts",
+        "View audit logs",
+        "System statistics"
+    ]
+}
+
+
+# Role-specific quick action buttons
+ROLE_QUICK_ACTIONS = {
+    'customer': [
+        {'label': 'Book Service', 'action': 'create_booking', 'icon': 'calendar'},
+        {'label': 'My Bookings', 'action': 'view_bookings', 'icon': 'list'},
+        {'label': 'Pending Signatures', 'action': 'view_signatures', 'icon': 'edit'},
+        {'label': 'Payment History', 'action': 'view_payments', 'icon': 'credit-card'}
+    ],
+    'vendor': [
+        {'label': 'Pending Jobs', 'action': 'view_jobs', 'icon': 'briefcase'},
+        {'label': 'Toggle Availability', 'action': 'toggle_availability', 'icon': 'power'},
+        {'label': 'My Earnings', 'action': 'view_earnings', 'icon': 'dollar-sign'},
+        {'label': 'Performance', 'action': 'view_stats', 'icon': 'trending-up'}
+    ],
+    'onboard_manager': [
+        {'label': 'Pending Vendors', 'action': 'view_pending_vendors', 'icon': 'users'},
+        {'label': 'Search Vendors', 'action': 'search_vendors', 'icon': 'search'},
+        {'label': 'Statistics', 'action': 'view_stats', 'icon': 'bar-chart'}
+    ],
+    'ops_manager': [
+        {'label': 'Live Jobs', 'action': 'view_live_jobs', 'icon': 'activity'},
+        {'label': 'Pending Signatures', 'action': 'view_signatures', 'icon': 'edit'},
+        {'label': 'Payment Approvals', 'action': 'view_payments', 'icon': 'check-circle'},
+        {'label': 'Alerts', 'action': 'view_alerts', 'icon': 'bell'}
+    ],
+    'super_admin': [
+        {'label': 'Analytics', 'action': 'view_analytics', 'icon': 'pie-chart'},
+        {'label': 'Manage Users', 'action': 'manage_users', 'icon': 'users'},
+        {'label': 'Services', 'action': 'manage_services', 'icon': 'tool'},
+        {'label': 'Audit Logs', 'action': 'view_audit_logs', 'icon': 'file-text'}
+    ]
+}
+
+
+def _current_role():
+    """
+    Return the current user's role.
+
+    jwt_required() has already loaded the user document through the
+    registered user_lookup_loader (rejecting tokens of deleted users), so
+    this reuses it instead of querying again.
+    """
+    return get_current_user().get('role', 'customer')
+
+
+# Serialized success responses for the static role payloads above, keyed by
+# (data key, role); built on first use so they match the app's JSON provider
+_role_payload_bodies = {}
+
+
+def _role_payload_response(key, payloads, role):
+    """
+    Return the success response for a role's static chatbot payload.
+
+    Args:
+        key (str): Key the payload is returned under in ``data``
+        payloads (dict): Payloads by role; unknown roles get the customer one
+        role (str): Current user's role
+
+    Returns:
+        Response: Cached JSON body with the api_success_response envelope
+    """
+    if role not in payloads:
+        role = 'customer'
+    body = _role_payload_bodies.get((key, role))
+    if body is None:
+        body = current_app.json.dumps({'success': True, 'data': {key: payloads[role]}}).encode('utf-8') + b'\n'
+        _role_payload_bodies[(key, role)] = body
+    return current_app.response_class(body, mimetype=current_app.json.mimetype)
+
+
 @chatbot_bp.route('/message', methods=['POST'])
 @jwt_required()
 def send_message():
@@ -55,26 +168,20 @@ def send_message():
             return api_error_response('Message too long (max 500 characters)', 400)
         
         # Get user info
-        user = User.find_by_id(user_id)
-        if not user:
-            return api_error_response('User not found', 404)
-
-        user_role = user.get('role', 'customer')
+        user_role = _current_role()
 
         # Build context for AI
         context = {}
 
-        # Add bookings context for customers and vendors
+        # The prompt only states how many bookings and services there are,
+        # so count them rather than loading the documents
         if user_role == 'customer':
-            bookings = list(Booking.find_by_customer(user_id))
-            context['bookings'] = bookings
+            context['booking_count'] = Booking.count({'customer_id': user_id})
         elif user_role == 'vendor':
-            bookings = list(Booking.find_by_vendor(user_id))
-            context['bookings'] = bookings
+            context['booking_count'] = Booking.count({'vendor_id': user_id})
 
-        # Add services context
-        services = list(Service.find_all_active())
-        context['services'] = services
+        # Add services context (cached catalogue listing)
+        context['service_count'] = len(Service.find_all_active(summary=True))
 
         # Try Google AI first, fallback to pattern-based
         try:
@@ -148,59 +255,8 @@ def get_suggestions():
         }
     """
     try:
-        user_id = get_jwt_identity()
-        user = User.find_by_id(user_id)
-        
-        if not user:
-            return api_error_response('User not found', 404)
-        
-        role = user.get('role', 'customer')
-        
-        # Role-specific suggestions
-        suggestions = {
-            'customer': [
-                "What's my booking status?",
-                "Book a plumbing service",
-                "Show my payment history",
-                "How do I sign a document?",
-                "Rate my last service",
-                "View available services"
-            ],
-            'vendor': [
-                "Show my pending jobs",
-                "What are my earnings?",
-                "Toggle my availability",
-                "How do I upload photos?",
-                "Request customer signature",
-                "View my performance stats"
-            ],
-            'onboard_manager': [
-                "Show pending vendor applications",
-                "How do I approve a vendor?",
-                "Search for a vendor",
-                "View onboarding statistics",
-                "Review KYC documents"
-            ],
-            'ops_manager': [
-                "Show live operations",
-                "Pending signatures",
-                "Approve payments",
-                "View operational alerts",
-                "Monitor booking trends"
-            ],
-            'super_admin': [
-                "Show system analytics",
-                "Manage users",
-                "View service catalog",
-                "Approve payouts",
-                "View audit logs",
-                "System statistics"
-            ]
-        }
-        
-        return api_success_response({
-            'suggestions': suggestions.get(role, suggestions['customer'])
-        })
+        role = _current_role()
+        return _role_payload_response('suggestions', ROLE_SUGGESTIONS, role)
         
     except Exception as e:
         return api_error_response(f'Failed to get suggestions: {str(e)}', 500)
@@ -227,50 +283,8 @@ def get_quick_actions():
         }
     """
     try:
-        user_id = get_jwt_identity()
-        user = User.find_by_id(user_id)
-        
-        if not user:
-            return api_error_response('User not found', 404)
-        
-        role = user.get('role', 'customer')
-        
-        # Role-specific quick actions
-        actions = {
-            'customer': [
-                {'label': 'Book Service', 'action': 'create_booking', 'icon': 'calendar'},
-                {'label': 'My Bookings', 'action': 'view_bookings', 'icon': 'list'},
-                {'label': 'Pending Signatures', 'action': 'view_signatures', 'icon': 'edit'},
-                {'label': 'Payment History', 'action': 'view_payments', 'icon': 'credit-card'}
-            ],
-            'vendor': [
-                {'label': 'Pending Jobs', 'action': 'view_jobs', 'icon': 'briefcase'},
-                {'label': 'Toggle Availability', 'action': 'toggle_availability', 'icon': 'power'},
-                {'label': 'My Earnings', 'action': 'view_earnings', 'icon': 'dollar-sign'},
-                {'label': 'Performance', 'action': 'view_stats', 'icon': 'trending-up'}
-            ],
-            'onboard_manager': [
-                {'label': 'Pending Vendors', 'action': 'view_pending_vendors', 'icon': 'users'},
-                {'label': 'Search Vendors', 'action': 'search_vendors', 'icon': 'search'},
-                {'label': 'Statistics', 'action': 'view_stats', 'icon': 'bar-chart'}
-            ],
-            'ops_manager': [
-                {'label': 'Live Jobs', 'action': 'view_live_jobs', 'icon': 'activity'},
-                {'label': 'Pending Signatures', 'action': 'view_signatures', 'icon': 'edit'},
-                {'label': 'Payment Approvals', 'action': 'view_payments', 'icon': 'check-circle'},
-                {'label': 'Alerts', 'action': 'view_alerts', 'icon': 'bell'}
-            ],
-            'super_admin': [
-                {'label': 'Analytics', 'action': 'view_analytics', 'icon': 'pie-chart'},
-                {'label': 'Manage Users', 'action': 'manage_users', 'icon': 'users'},
-                {'label': 'Services', 'action': 'manage_services', 'icon': 'tool'},
-                {'label': 'Audit Logs', 'action': 'view_audit_logs', 'icon': 'file-text'}
-            ]
-        }
-        
-        return api_success_response({
-            'actions': actions.get(role, actions['customer'])
-        })
+        role = _current_role()
+        return _role_payload_response('actions', ROLE_QUICK_ACTIONS, role)
         
     except Exception as e:
         return api_error_response(f'Failed to get quick actions: {str(e)}', 500)
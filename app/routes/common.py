@@ -41,11 +41,10 @@ def get_public_services():
         query = request.args.get('q', '')
         pincode = request.args.get('pincode', '')
 
-        if query:
-            services = Service.search(query, pincode)
-        else:
-            services = Service.find_all_active()
+        if not query:
+            return api_success_response(Service.active_dicts())
 
+        services = Service.search(query, pincode, prefix=request.args.get('match') == 'prefix')
         return api_success_response([Service.to_dict(s) for s in services])
 
     except Exception as e:
@@ -118,7 +117,7 @@ def get_public_vendors():
 
         if service_type:
             # Filter by service category - check if any service in vendor's services matches the category
-            category_services = Service.find_by_category(service_type)
+            category_services = Service.find_by_category(service_type, summary=True)
             if category_services:
                 service_names = [s.get('name') for s in category_services]
                 filters['services'] = {'$in': service_names}
@@ -127,16 +126,26 @@ def get_public_vendors():
             filters['pincodes'] = {'$in': [pincode]}
 
         # Fetch vendors from database
-        vendors = list(Vendor.find_all(filters, skip=0, limit=limit))
+        vendors = Vendor.find_all(filters, skip=0, limit=limit)
+
+        # Resolve the vendors' user accounts and the categories of their
+        # first services with one query each
+        users = User.find_by_ids(
+            [v['user_id'] for v in vendors if v.get('user_id')],
+            projection={'name': 1, 'email': 1, 'phone': 1, 'role': 1}
+        )
+        first_service_names = {v['services'][0] for v in vendors if v.get('services')}
+        service_categories = {
+            s['name']: s.get('category', 'General')
+            for s in Service.find_by_names(first_service_names, projection={'name': 1, 'category': 1})
+        }
 
         # Process and validate vendors
         result = []
         for vendor in vendors:
             try:
                 # Verify vendor has valid user account
-                user = None
-                if vendor.get('user_id'):
-                    user = User.find_by_id(str(vendor['user_id']))
+                user = users.get(str(vendor.get('user_id')))
 
                 if not user or user.get('role') != User.ROLE_VENDOR:
                     continue  # Skip vendors without valid user accounts
@@ -150,11 +159,9 @@ def get_public_vendors():
                 # Determine primary service type
                 vendor_services = vendor_dict.get('services', [])
                 primary_service_type = 'General'
-                if vendor_services:
+                if vendor_services and vendor_services[0] in service_categories:
                     # Get the category of the first service
-                    first_service = Service.find_by_name(vendor_services[0])
-                    if first_service:
-                        primary_service_type = first_service.get('category', 'General').title()
+                    primary_service_type = service_categories[vendor_services[0]].title()
 
                 # Build public vendor data
                 public_vendor = {
@@ -289,11 +296,13 @@ def get_notifications():
     try:
         user_id = get_jwt_identity()
         unread_only = request.args.get('unread', 'false').lower() == 'true'
+        summary = request.args.get('summary', 'false').lower() == 'true'
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
         skip = (page - 1) * limit
 
-        notifications = Notification.find_by_user(user_id, unread_only, skip, limit)
+        notifications = Notification.find_by_user(user_id, unread_only, skip, limit,
+                                                  summary=summary)
         unread_count = Notification.count_unread(user_id)
 
         return api_success_response({
@@ -8,7 +8,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.user import User
 from app.models.booking import Booking
 from app.models.service import Service
-from app.models.vendor import Vendor
+from app.models.vendor import Vendor, LIST_PROJECTION as VENDOR_LIST_PROJECTION
 from app.models.signature import Signature
 from app.models.notification import Notification
 from app.models.audit_log import AuditLog
@@ -85,7 +85,7 @@ def search_by_pincode(user):
         if pincode:
             vendor_filters['service_areas'] = {'$in': [pincode]}
 
-        vendors = list(Vendor.find_all(vendor_filters))
+        vendors = Vendor.find_all(vendor_filters, projection=VENDOR_LIST_PROJECTION)
 
         # Calculate demand metrics for dynamic pricing
         recent_bookings = list(Booking.find_all({
@@ -124,7 +124,7 @@ def search_by_pincode(user):
                         {
                             'id': str(v['_id']),
                             'name': v.get('name', 'Unknown'),
-                            'rating': v.get('ratings', 0),
+                            'rating': Vendor.average_rating(v),
                             'completed_jobs': v.get('completed_jobs', 0)
                         }
                         for v in available_vendors[:3]  # Top 3 vendors
@@ -159,7 +159,7 @@ def get_services():
         pincode = request.args.get('pincode', '')
         
         if query:
-            services = Service.search(query, pincode)
+            services = Service.search(query, pincode, prefix=request.args.get('match') == 'prefix')
         else:
             services = Service.find_all_active()
         
@@ -242,12 +242,14 @@ def create_booking(user):
         else:
             # Auto-assign best available vendor
             try:
-                available_vendors = Vendor.find_available_by_service(service['name'], pincode)
+                available_vendors = Vendor.find_available_by_service(
+                    service['name'], pincode, projection=VENDOR_LIST_PROJECTION
+                )
 
                 if available_vendors:
                     # Select best vendor based on rating, completed jobs, and availability
                     selected_vendor = max(available_vendors, key=lambda v: (
-                        v.get('ratings', 0),
+                        Vendor.average_rating(v),
                         v.get('completed_jobs', 0),
                         1 if v.get('availability') else 0
                     ))
@@ -522,7 +524,7 @@ def get_dashboard(user):
                     booking_dict['vendor_info'] = {
                         'name': vendor.get('name', 'Unknown'),
                         'phone': vendor.get('phone', ''),
-                        'rating': vendor.get('ratings', 0),
+                        'rating': Vendor.average_rating(vendor),
                         'completed_jobs': vendor.get('completed_jobs', 0)
                     }
 
@@ -606,7 +608,7 @@ def get_bookings(user):
         limit = int(request.args.get('limit', 20))
         skip = (page - 1) * limit
         
-        bookings = Booking.find_by_customer(str(user['_id']), skip, limit)
+        bookings = Booking.find_by_customer(str(user['_id']), skip, limit, lazy=True)
         total = Booking.count({'customer_id': user['_id']})
         
         return api_success_response({
@@ -773,11 +775,13 @@ def get_notifications(user):
     """Get customer notifications."""
     try:
         unread_only = request.args.get('unread', 'false').lower() == 'true'
+        summary = request.args.get('summary', 'false').lower() == 'true'
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
         skip = (page - 1) * limit
         
-        notifications = Notification.find_by_user(str(user['_id']), unread_only, skip, limit)
+        notifications = Notification.find_by_user(str(user['_id']), unread_only, skip, limit,
+                                                  summary=summary)
         unread_count = Notification.count_unread(str(user['_id']))
         
         return api_success_response({
@@ -5,7 +5,7 @@ Handles vendor onboarding, KYC verification, and approval workflows.
 
 from flask import Blueprint, request
 from app.models.vendor import Vendor
-from app.models.user import User
+from app.models.user import User, SUMMARY_PROJECTION
 from app.models.notification import Notification
 from app.models.audit_log import AuditLog
 from app.utils.decorators import onboard_manager_required
@@ -29,10 +29,13 @@ def get_verification_requests(user):
             {'status': 'pending'}
         ).sort('created_at', -1).skip(skip).limit(limit)
 
+        requests_page = list(requests_cursor)
+        vendors_by_id = Vendor.find_by_ids(req['vendor_id'] for req in requests_page)
+
         requests_list = []
-        for req in requests_cursor:
+        for req in requests_page:
             # Get vendor details
-            vendor = Vendor.find_by_id(req['vendor_id'])
+            vendor = vendors_by_id.get(str(req['vendor_id']))
             if vendor:
                 requests_list.append({
                     'id': str(req['_id']),
@@ -75,10 +78,11 @@ def get_pending_vendors(user):
         total = Vendor.count({'onboarding_status': Vendor.STATUS_PENDING})
         
         # Enrich with user data
+        users_by_id = User.find_by_ids(vendor['user_id'] for vendor in vendors)
         enriched_vendors = []
         for vendor in vendors:
             vendor_dict = Vendor.to_dict(vendor)
-            vendor_user = User.find_by_id(str(vendor['user_id']))
+            vendor_user = users_by_id.get(str(vendor['user_id']))
             if vendor_user:
                 vendor_dict['user'] = User.to_dict(vendor_user)
             enriched_vendors.append(vendor_dict)
@@ -280,7 +284,7 @@ def search_vendors(user):
                 {'email': {'$regex': query, '$options': 'i'}},
                 {'phone': {'$regex': query, '$options': 'i'}}
             ]
-        })
+        }, projection=SUMMARY_PROJECTION)
         
         # Get corresponding vendor profiles
         vendors = []
@@ -4,7 +4,7 @@ Handles live job monitoring, payment approvals, and operational oversight.
 """
 
 from flask import Blueprint, request
-from app.models.booking import Booking
+from app.models.booking import Booking, LIST_PROJECTION
 from app.models.payment import Payment
 from app.models.vendor import Vendor
 from app.models.user import User
@@ -12,6 +12,7 @@ from app.models.audit_log import AuditLog
 from app.models.notification import Notification
 from app.utils.decorators import ops_manager_required
 from app.utils.error_handlers import api_error_response, api_success_response
+from app.utils.pagination import parse_cursor, next_cursor
 from datetime import datetime, timedelta
 
 ops_manager_bp = Blueprint('ops_manager', __name__)
@@ -24,7 +25,8 @@ def get_live_bookings(user):
     try:
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 50))
-        skip = (page - 1) * limit
+        before = parse_cursor(request.args.get('before'))
+        skip = 0 if before else (page - 1) * limit
         
         # Get bookings that are not completed or cancelled
         active_statuses = [
@@ -33,20 +35,24 @@ def get_live_bookings(user):
             Booking.STATUS_IN_PROGRESS
         ]
         
-        bookings = Booking.find_all(
+        bookings, total = Booking.find_page(
             {'status': {'$in': active_statuses}},
-            skip,
-            limit
+            skip=skip,
+            limit=limit,
+            before=before,
+            projection=LIST_PROJECTION
         )
-        total = Booking.count({'status': {'$in': active_statuses}})
         
         return api_success_response({
-            'bookings': [Booking.to_dict(b) for b in bookings],
+            'bookings': [Booking.to_json_doc(b) for b in bookings],
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
+            'pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor(bookings, limit)
         })
         
+    except ValueError as ve:
+        return api_error_response(f'Invalid parameter: {str(ve)}', 400)
     except Exception as e:
         return api_error_response(f'Failed to get live bookings: {str(e)}', 500)
 
@@ -57,10 +63,10 @@ def get_pending_signatures(user):
     """Get bookings with pending signatures."""
     try:
         days = int(request.args.get('days', 2))
-        bookings = Booking.get_pending_signatures(days)
+        bookings = [Booking.to_dict(b) for b in Booking.get_pending_signatures(days)]
         
         return api_success_response({
-            'bookings': [Booking.to_dict(b) for b in bookings],
+            'bookings': bookings,
             'count': len(bookings)
         })
         
@@ -128,7 +134,7 @@ def approve_payment(user, payment_id):
             Vendor.add_earnings(str(payment['vendor_id']), payment['amount'])
             
             # Notify vendor
-            Notification.create({
+            Notification.queue_create({
                 'user_id': str(payment['vendor_id']),
                 'type': Notification.TYPE_PAYMENT_RELEASED,
                 'title': 'Payment Released',
@@ -158,7 +164,7 @@ def get_dashboard_stats(user):
     """Get operational dashboard statistics."""
     try:
         # Booking stats
-        total_bookings = Booking.count({})
+        total_bookings = Booking.count()
         pending_bookings = Booking.count({'status': Booking.STATUS_PENDING})
         in_progress_bookings = Booking.count({'status': Booking.STATUS_IN_PROGRESS})
         completed_today = Booking.count({
@@ -167,7 +173,7 @@ def get_dashboard_stats(user):
         })
         
         # Signature stats
-        pending_signatures = len(Booking.get_pending_signatures(2))
+        pending_signatures = Booking.count_pending_signatures(2)
         
         # Payment stats
         pending_payments = Payment.count({'status': Payment.STATUS_PENDING})
@@ -238,13 +244,13 @@ def get_alerts(user):
         alerts = []
         
         # Pending signatures alert
-        pending_sigs = Booking.get_pending_signatures(2)
+        pending_sigs = Booking.count_pending_signatures(2)
         if pending_sigs:
             alerts.append({
                 'type': 'pending_signatures',
                 'severity': 'warning',
-                'count': len(pending_sigs),
-                'message': f'{len(pending_sigs)} bookings have pending signatures for 48+ hours'
+                'count': pending_sigs,
+                'message': f'{pending_sigs} bookings have pending signatures for 48+ hours'
             })
         
         # Pending payments alert
@@ -280,7 +286,8 @@ def get_audit_logs(user):
     try:
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 50))
-        skip = (page - 1) * limit
+        before = parse_cursor(request.args.get('before'))
+        skip = 0 if before else (page - 1) * limit
         
         filters = {}
         
@@ -292,16 +299,19 @@ def get_audit_logs(user):
         if request.args.get('user_id'):
             filters['user_id'] = request.args.get('user_id')
         
-        logs = AuditLog.find_all(filters, skip, limit)
+        logs = AuditLog.find_all(filters, skip, limit, before=before)
         total = AuditLog.count(filters)
         
         return api_success_response({
             'logs': [AuditLog.to_dict(log) for log in logs],
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
+            'pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor(logs, limit, field='timestamp')
         })
         
+    except ValueError as ve:
+        return api_error_response(f'Invalid parameter: {str(ve)}', 400)
     except Exception as e:
         return api_error_response(f'Failed to get audit logs: {str(e)}', 500)
 
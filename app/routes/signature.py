@@ -69,7 +69,7 @@ def complete_and_request_signature(user):
         Booking.update(booking_id, update_data)
         
         # Request signature with 48-hour timeout
-        signature_requested = Booking.request_signature(booking_id, timeout_hours=48)
+        signature_requested = Booking.request_signature(booking_id, timeout_hours=48) is not None
         
         if signature_requested:
             # Get customer info for notification
@@ -195,7 +195,7 @@ def submit_signature(user):
         signature_id = Signature.create(signature_data_record)
         
         # Update booking with signature
-        signature_submitted = Booking.submit_signature(booking_id, signature_hash)
+        signature_submitted = Booking.submit_signature(booking_id, signature_hash) is not None
         
         if signature_submitted:
             # Create notification for vendor
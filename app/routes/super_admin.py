@@ -4,16 +4,16 @@ Handles system-wide administration, analytics, and user management.
 """
 
 from flask import Blueprint, request
-from app.models.user import User
-from app.models.vendor import Vendor
-from app.models.booking import Booking
+from app.models.user import User, SUMMARY_PROJECTION as USER_SUMMARY_PROJECTION
+from app.models.vendor import Vendor, SUMMARY_PROJECTION as VENDOR_SUMMARY_PROJECTION
+from app.models.booking import Booking, LIST_PROJECTION
 from app.models.payment import Payment
 from app.models.service import Service
 from app.models.audit_log import AuditLog
 from app.utils.decorators import super_admin_required
 from app.utils.error_handlers import api_error_response, api_success_response
+from app.utils.pagination import parse_cursor, next_cursor
 from datetime import datetime, timedelta
-from bson import ObjectId
 
 super_admin_bp = Blueprint('super_admin', __name__)
 
@@ -34,7 +34,7 @@ def get_analytics(user):
         vendors = User.count({'role': User.ROLE_VENDOR})
 
         # Booking stats
-        total_bookings = Booking.count({})
+        total_bookings = Booking.count()
         completed_bookings = Booking.count({'status': Booking.STATUS_VERIFIED})
         pending_bookings = Booking.count({'status': Booking.STATUS_PENDING})
 
@@ -118,7 +118,7 @@ def get_all_users(user):
         if request.args.get('active'):
             filters['active'] = request.args.get('active').lower() == 'true'
 
-        users = User.find_all(filters, skip, limit)
+        users = User.find_all(filters, skip, limit, projection=USER_SUMMARY_PROJECTION)
         total = User.count(filters)
 
         return api_success_response({
@@ -152,7 +152,7 @@ def get_user_details(user, user_id):
 
         # Include activity stats
         if target_user['role'] == User.ROLE_CUSTOMER:
-            user_dict['booking_count'] = Booking.count({'customer_id': ObjectId(user_id)})
+            user_dict['booking_count'] = Booking.count({'customer_id': user_id})
         elif target_user['role'] == User.ROLE_VENDOR:
             vendor = Vendor.find_by_user_id(user_id)
             if vendor:
@@ -204,7 +204,7 @@ def toggle_user_active(user, user_id):
 def get_all_services(user):
     """Get all services."""
     try:
-        services = Service.find_all_active()
+        services = Service.iter_all_active()
         return api_success_response([Service.to_dict(s) for s in services])
 
     except Exception as e:
@@ -447,10 +447,11 @@ def get_pending_payouts(user):
         payouts = Payment.find_pending_payouts()
 
         # Enrich with vendor data
+        vendors_by_id = Vendor.find_by_ids(payout['vendor_id'] for payout in payouts)
         enriched_payouts = []
         for payout in payouts:
             payout_dict = Payment.to_dict(payout)
-            vendor = Vendor.find_by_id(str(payout['vendor_id']))
+            vendor = vendors_by_id.get(str(payout['vendor_id']))
             if vendor:
                 payout_dict['vendor'] = Vendor.to_dict(vendor)
             enriched_payouts.append(payout_dict)
@@ -503,7 +504,8 @@ def get_all_audit_logs(user):
     try:
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 50))
-        skip = (page - 1) * limit
+        before = parse_cursor(request.args.get('before'))
+        skip = 0 if before else (page - 1) * limit
 
         filters = {}
 
@@ -517,16 +519,19 @@ def get_all_audit_logs(user):
         if request.args.get('entity_id'):
             filters['entity_id'] = request.args.get('entity_id')
 
-        logs = AuditLog.find_all(filters, skip, limit)
+        logs = AuditLog.find_all(filters, skip, limit, before=before)
         total = AuditLog.count(filters)
 
         return api_success_response({
             'logs': [AuditLog.to_dict(log) for log in logs],
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
+            'pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor(logs, limit, field='timestamp')
         })
 
+    except ValueError as ve:
+        return api_error_response(f'Invalid parameter: {str(ve)}', 400)
     except Exception as e:
         return api_error_response(f'Failed to get audit logs: {str(e)}', 500)
 
@@ -547,7 +552,7 @@ def admin_get_vendors(user):
         if request.args.get('availability'):
             val = request.args.get('availability').lower() == 'true'
             filters['availability'] = val
-        vendors = Vendor.find_all(filters, skip, limit)
+        vendors = Vendor.find_all(filters, skip, limit, projection=VENDOR_SUMMARY_PROJECTION)
         total = Vendor.count(filters)
         return api_success_response({
             'vendors': [Vendor.to_dict(v) for v in vendors],
@@ -591,19 +596,23 @@ def admin_get_bookings(user):
     try:
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
-        skip = (page - 1) * limit
+        before = parse_cursor(request.args.get('before'))
+        skip = 0 if before else (page - 1) * limit
         filters = {}
         status = request.args.get('status')
         if status:
             filters['status'] = status
-        bookings = Booking.find_all(filters, skip, limit)
-        total = Booking.count(filters)
+        bookings, total = Booking.find_page(filters, skip=skip, limit=limit, before=before,
+                                            projection=LIST_PROJECTION)
         return api_success_response({
-            'bookings': [Booking.to_dict(b) for b in bookings],
+            'bookings': [Booking.to_json_doc(b) for b in bookings],
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
+            'pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor(bookings, limit)
         })
+    except ValueError as ve:
+        return api_error_response(f'Invalid parameter: {str(ve)}', 400)
     except Exception as e:
         return api_error_response(f'Failed to get bookings: {str(e)}', 500)
 
@@ -616,16 +625,20 @@ def admin_get_live_bookings(user):
     try:
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
-        skip = (page - 1) * limit
+        before = parse_cursor(request.args.get('before'))
+        skip = 0 if before else (page - 1) * limit
         filters = {'status': {'$in': [Booking.STATUS_ACCEPTED, Booking.STATUS_IN_PROGRESS]}}
-        bookings = Booking.find_all(filters, skip, limit)
-        total = Booking.count(filters)
+        bookings, total = Booking.find_page(filters, skip=skip, limit=limit, before=before,
+                                            projection=LIST_PROJECTION)
         return api_success_response({
-            'bookings': [Booking.to_dict(b) for b in bookings],
+            'bookings': [Booking.to_json_doc(b) for b in bookings],
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
+            'pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor(bookings, limit)
         })
+    except ValueError as ve:
+        return api_error_response(f'Invalid parameter: {str(ve)}', 400)
     except Exception as e:
         return api_error_response(f'Failed to get live bookings: {str(e)}', 500)
 
@@ -638,8 +651,8 @@ def admin_start_booking(user, booking_id):
         booking = Booking.find_by_id(booking_id)
         if not booking:
             return api_error_response('Booking not found', 404)
-        ok = Booking.update_status(booking_id, Booking.STATUS_IN_PROGRESS)
-        if not ok:
+        updated = Booking.update_status(booking_id, Booking.STATUS_IN_PROGRESS)
+        if not updated:
             return api_error_response('Failed to start booking', 500)
         AuditLog.log(
             action=AuditLog.ACTION_UPDATE,
@@ -649,7 +662,6 @@ def admin_start_booking(user, booking_id):
             details={'status': Booking.STATUS_IN_PROGRESS},
             ip_address=request.remote_addr
         )
-        updated = Booking.find_by_id(booking_id)
         return api_success_response(Booking.to_dict(updated), 'Booking started')
     except Exception as e:
         return api_error_response(f'Failed to start booking: {str(e)}', 500)
@@ -663,8 +675,8 @@ def admin_complete_booking(user, booking_id):
         booking = Booking.find_by_id(booking_id)
         if not booking:
             return api_error_response('Booking not found', 404)
-        ok = Booking.update_status(booking_id, Booking.STATUS_COMPLETED)
-        if not ok:
+        updated = Booking.update_status(booking_id, Booking.STATUS_COMPLETED)
+        if not updated:
             return api_error_response('Failed to complete booking', 500)
         AuditLog.log(
             action=AuditLog.ACTION_UPDATE,
@@ -674,7 +686,6 @@ def admin_complete_booking(user, booking_id):
             details={'status': Booking.STATUS_COMPLETED},
             ip_address=request.remote_addr
         )
-        updated = Booking.find_by_id(booking_id)
         return api_success_response(Booking.to_dict(updated), 'Booking completed')
     except Exception as e:
         return api_error_response(f'Failed to complete booking: {str(e)}', 500)
@@ -688,8 +699,8 @@ def admin_cancel_booking(user, booking_id):
         booking = Booking.find_by_id(booking_id)
         if not booking:
             return api_error_response('Booking not found', 404)
-        ok = Booking.update_status(booking_id, Booking.STATUS_CANCELLED)
-        if not ok:
+        updated = Booking.update_status(booking_id, Booking.STATUS_CANCELLED)
+        if not updated:
             return api_error_response('Failed to cancel booking', 500)
         AuditLog.log(
             action=AuditLog.ACTION_UPDATE,
@@ -699,7 +710,6 @@ def admin_cancel_booking(user, booking_id):
             details={'status': Booking.STATUS_CANCELLED},
             ip_address=request.remote_addr
         )
-        updated = Booking.find_by_id(booking_id)
         return api_success_response(Booking.to_dict(updated), 'Booking cancelled')
     except Exception as e:
         return api_error_response(f'Failed to cancel booking: {str(e)}', 500)
@@ -718,7 +728,7 @@ def admin_available_vendors_for_booking(user, booking_id):
         if not service_name:
             return api_error_response('Service not found for booking', 400)
         pincode = booking.get('pincode') or request.args.get('pincode')
-        vendors = Vendor.find_available_by_service(service_name, pincode)
+        vendors = Vendor.find_available_by_service(service_name, pincode, projection=VENDOR_SUMMARY_PROJECTION)
         return api_success_response({'vendors': [Vendor.to_dict(v) for v in vendors]})
     except Exception as e:
         return api_error_response(f'Failed to get available vendors: {str(e)}', 500)
@@ -739,8 +749,8 @@ def admin_reassign_booking(user, booking_id):
         vendor = Vendor.find_by_id(vendor_id)
         if not vendor:
             return api_error_response('Vendor not found', 404)
-        ok = Booking.update(booking_id, {'vendor_id': ObjectId(vendor_id)})
-        if not ok:
+        updated = Booking.update(booking_id, {'vendor_id': vendor_id})
+        if not updated:
             return api_error_response('Failed to reassign booking', 500)
         AuditLog.log(
             action=AuditLog.ACTION_UPDATE,
@@ -750,7 +760,6 @@ def admin_reassign_booking(user, booking_id):
             details={'reassigned_to': vendor_id},
             ip_address=request.remote_addr
         )
-        updated = Booking.find_by_id(booking_id)
         return api_success_response(Booking.to_dict(updated), 'Booking reassigned')
     except Exception as e:
         return api_error_response(f'Failed to reassign booking: {str(e)}', 500)
@@ -769,7 +778,7 @@ def admin_available_vendors(user):
             service_name = service.get('name') if service else None
         if not service_name:
             return api_error_response('service_id or service_name required', 400)
-        vendors = Vendor.find_available_by_service(service_name, pincode)
+        vendors = Vendor.find_available_by_service(service_name, pincode, projection=VENDOR_SUMMARY_PROJECTION)
         return api_success_response({'vendors': [Vendor.to_dict(v) for v in vendors]})
     except Exception as e:
         return api_error_response(f'Failed to get available vendors: {str(e)}', 500)
@@ -6,7 +6,7 @@ Handles vendor-specific operations like managing bookings, uploading photos, and
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.user import User
-from app.models.booking import Booking
+from app.models.booking import Booking, LIST_PROJECTION
 from app.models.vendor import Vendor
 from app.models.signature import Signature
 from app.models.payment import Payment
@@ -16,6 +16,7 @@ from app.models.service import Service
 from app.utils.decorators import vendor_required
 from app.utils.error_handlers import api_error_response, api_success_response
 from app.utils.file_upload import save_image, save_upload_file, get_file_url
+from app.utils.pagination import parse_cursor, next_cursor
 from app import socketio
 import os
 import re
@@ -355,8 +356,7 @@ def register_bank_details(user):
             Vendor.complete_registration(str(vendor['_id']))
 
             # Create notification for admin review
-            Notification.create({
-                'user_id': 'admin',  # Will be handled by admin notification system
+            Notification.queue_for_admins({
                 'type': Notification.TYPE_VENDOR_REGISTRATION,
                 'title': 'New Vendor Registration',
                 'message': f'Vendor {vendor.get("name")} has completed registration and is pending approval',
@@ -716,12 +716,10 @@ def create_custom_service(user):
             'vendor_id': str(vendor['_id'])
         }
 
-        # Get or initialize custom_services array
-        from app import mongo
         vendor_id = str(vendor['_id'])
 
         # Add to vendor's custom services
-        result = mongo.db[Vendor.COLLECTION].update_one(
+        result = Vendor._coll().update_one(
             {'_id': vendor['_id']},
             {
                 '$push': {'custom_services': custom_service},
@@ -790,7 +788,7 @@ def get_dashboard(user):
         ))
 
         # Calculate performance metrics
-        rating = vendor.get('ratings', 0.0)
+        rating = Vendor.average_rating(vendor)
         total_ratings = vendor.get('total_ratings', 0)
 
         # Get registration progress
@@ -1115,7 +1113,7 @@ def start_booking(user, booking_id):
             # Notify customer
             customer = User.find_by_id(str(booking['customer_id']))
             if customer:
-                Notification.create({
+                Notification.queue_create({
                     'user_id': str(customer['_id']),
                     'type': Notification.TYPE_BOOKING_STARTED,
                     'title': 'Service Started',
@@ -1183,7 +1181,7 @@ def complete_booking(user, booking_id):
             # Notify customer
             customer = User.find_by_id(str(booking['customer_id']))
             if customer:
-                Notification.create({
+                Notification.queue_create({
                     'user_id': str(customer['_id']),
                     'type': Notification.TYPE_BOOKING_COMPLETED,
                     'title': 'Service Completed',
@@ -1326,7 +1324,7 @@ def get_earnings(user):
         vendor_id = str(vendor['_id'])
 
         # Get payment history
-        payments = list(Payment.find_all({'vendor_id': vendor_id}))
+        payments = Payment.find_all({'vendor_id': vendor_id}, limit=0)
 
         # Calculate earnings summary
         total_earnings = sum(p.get('amount', 0) for p in payments if p.get('status') == 'completed')
@@ -1388,7 +1386,7 @@ def request_payout(user):
 
         # Check available balance
         vendor_id = str(vendor['_id'])
-        payments = list(Payment.find_all({'vendor_id': vendor_id}))
+        payments = Payment.find_all({'vendor_id': vendor_id}, limit=0)
         total_earnings = sum(p.get('amount', 0) for p in payments if p.get('status') == 'completed')
         total_payouts = sum(p.get('amount', 0) for p in payments if p.get('type') == 'payout')
         available_balance = total_earnings - total_payouts
@@ -1427,8 +1425,7 @@ def request_payout(user):
         payout_id = Payment.create(payout_data)
 
         # Create notification for admin
-        Notification.create({
-            'user_id': 'admin',
+        Notification.queue_for_admins({
             'type': Notification.TYPE_PAYOUT_REQUESTED,
             'title': 'Payout Request',
             'message': f'Vendor {vendor.get("name")} requested payout of ₹{amount}',
@@ -1626,8 +1623,7 @@ def support_tickets(user):
             ticket_id = ticket_data['ticket_id']
 
             # Create notification for admin
-            Notification.create({
-                'user_id': 'admin',
+            Notification.queue_for_admins({
                 'type': Notification.TYPE_SUPPORT_TICKET,
                 'title': 'New Support Ticket',
                 'message': f'Vendor {vendor.get("name")} created a support ticket: {data["subject"]}',
@@ -1921,9 +1917,8 @@ def verify_profile(user):
         })
 
         # Create notification for admins
-        Notification.create({
-            'user_id': 'admin',  # Special admin notification
-            'type': 'vendor_verification_request',
+        Notification.queue_for_admins({
+            'type': Notification.TYPE_VENDOR_VERIFICATION_REQUEST,
             'title': 'New Vendor Verification Request',
             'message': f'Vendor {vendor.get("name")} has submitted documents for verification',
             'data': {'vendor_id': vendor_id}
@@ -1958,8 +1953,9 @@ def toggle_availability(user):
         if not vendor:
             return api_error_response('Vendor profile not found', 404)
 
-        Vendor.toggle_availability(str(vendor['_id']))
-        updated_vendor = Vendor.find_by_id(str(vendor['_id']))
+        updated_vendor = Vendor.toggle_availability(vendor['_id'])
+        if not updated_vendor:
+            return api_error_response('Vendor profile not found', 404)
 
         # Log availability change
         AuditLog.log(
@@ -1992,23 +1988,26 @@ def get_bookings(user):
         status = request.args.get('status', '')
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
-        skip = (page - 1) * limit
+        before = parse_cursor(request.args.get('before'))
+        skip = 0 if before else (page - 1) * limit
 
+        filters = {'vendor_id': vendor['_id']}
         if status:
-            bookings = Booking.find_by_status(status, skip, limit)
-            bookings = [b for b in bookings if str(b['vendor_id']) == str(vendor['_id'])]
-            total = len(bookings)
-        else:
-            bookings = Booking.find_by_vendor(str(vendor['_id']), skip, limit)
-            total = Booking.count({'vendor_id': vendor['_id']})
+            filters['status'] = status
+        bookings = Booking.find_by_vendor(str(vendor['_id']), skip, limit, before=before,
+                                          projection=LIST_PROJECTION, status=status)
+        total = Booking.count(filters)
 
         return api_success_response({
             'bookings': [Booking.to_dict(b) for b in bookings],
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
+            'pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor(bookings, limit)
         })
 
+    except ValueError as ve:
+        return api_error_response(f'Invalid parameter: {str(ve)}', 400)
     except Exception as e:
         return api_error_response(f'Failed to get bookings: {str(e)}', 500)
 
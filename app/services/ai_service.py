@@ -6,6 +6,7 @@ Handles pincode clustering, travel time prediction, and vendor allocation.
 import numpy as np
 from datetime import datetime, timedelta
 import os
+from app.models.vendor import Vendor
 
 
 class PincodePulseEngine:
@@ -207,7 +208,7 @@ class VendorAllocationEngine:
             score = 0.0
             
             # Rating factor (40%)
-            rating = vendor.get('ratings', 0)
+            rating = Vendor.average_rating(vendor)
             rating_score = rating / 5.0
             score += rating_score * 0.4
             
@@ -5,6 +5,7 @@ Provides context-aware assistance across all user roles
 
 import re
 import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from bson import ObjectId
@@ -608,9 +609,17 @@ class GoogleAIChatbot:
     Falls back to pattern-based responses if API is unavailable
     """
 
+    # Model calls run on a small shared pool so a slow API answer is cut off
+    # after AI_TIMEOUT_SECONDS (the fallback answers instead) rather than
+    # holding the request for the full model latency
+    AI_MAX_CONCURRENT = 4
+    AI_TIMEOUT_SECONDS = 8
+
     def __init__(self):
         """Initialize Google AI chatbot"""
         self.model = None
+        self._executor = ThreadPoolExecutor(max_workers=self.AI_MAX_CONCURRENT,
+                                            thread_name_prefix='chatbot-ai')
         self.api_key = os.getenv('GOOGLE_API_KEY')
 
         if GENAI_AVAILABLE and self.api_key:
@@ -631,7 +640,7 @@ class GoogleAIChatbot:
         Args:
             message: User's message
             user_role: User's role (customer, vendor, admin, etc.)
-            context: Additional context (bookings, services, etc.)
+            context: Additional context (booking_count, service_count, etc.)
 
         Returns:
             AI-generated response
@@ -645,7 +654,13 @@ class GoogleAIChatbot:
             prompt = self._build_prompt(message, user_role, context)
 
             # Generate response
-            response = self.model.generate_content(prompt)
+            future = self._executor.submit(self.model.generate_content, prompt)
+            try:
+                response = future.result(timeout=self.AI_TIMEOUT_SECONDS)
+            except FutureTimeoutError:
+                future.cancel()
+                print(f"AI response timed out after {self.AI_TIMEOUT_SECONDS}s")
+                return self._fallback_response(message, user_role)
 
             if response and response.text:
                 return response.text
@@ -709,10 +724,10 @@ As an admin assistant:
         # Add context data if available
         data_context = ""
         if context:
-            if 'bookings' in context:
-                data_context += f"\nUser has {len(context['bookings'])} bookings."
-            if 'services' in context:
-                data_context += f"\nAvailable services: {len(context['services'])}."
+            if 'booking_count' in context:
+                data_context += f"\nUser has {context['booking_count']} bookings."
+            if 'service_count' in context:
+                data_context += f"\nAvailable services: {context['service_count']}."
 
         # Build final prompt
         full_prompt = f"""{system_context}
@@ -285,9 +285,12 @@ Your earnings have been updated.
             'details': []
         }
         
+        vendors_by_id = Vendor.find_by_ids(vendor_ids)
+        users_by_id = User.find_by_ids(vendor['user_id'] for vendor in vendors_by_id.values())
+        
         for vendor_id in vendor_ids:
             try:
-                vendor = Vendor.find_by_id(vendor_id)
+                vendor = vendors_by_id.get(str(vendor_id))
                 if not vendor:
                     results['details'].append({
                         'vendor_id': vendor_id,
@@ -297,7 +300,7 @@ Your earnings have been updated.
                     results['failed_notifications'] += 1
                     continue
                 
-                user = User.find_by_id(str(vendor['user_id']))
+                user = users_by_id.get(str(vendor['user_id']))
                 if not user:
                     results['details'].append({
                         'vendor_id': vendor_id,
@@ -30,7 +30,7 @@ def check_signature_timeouts():
             # Escalate the booking
             escalated = Booking.escalate_signature_timeout(booking_id)
             
-            if escalated:
+            if escalated is not None:
                 escalated_count += 1
                 
                 # Get customer and vendor info
@@ -38,22 +38,21 @@ def check_signature_timeouts():
                 vendor = User.find_by_id(booking['vendor_id'])
                 
                 # Create escalation notification for admin
-                admin_users = User.find_all({'role': 'super_admin'})
-                for admin in admin_users:
-                    Notification.create({
-                        'user_id': str(admin['_id']),
-                        'type': Notification.TYPE_ESCALATION,
-                        'title': 'Signature Request Expired',
-                        'message': f'Customer signature request expired for booking {booking_id}. Manual intervention required.',
-                        'data': {
-                            'booking_id': booking_id,
-                            'customer_name': customer.get('name', 'Unknown') if customer else 'Unknown',
-                            'vendor_name': vendor.get('name', 'Unknown') if vendor else 'Unknown',
-                            'service_name': booking.get('service_name', 'Service'),
-                            'expired_at': booking.get('signature_timeout_at'),
-                            'escalation_reason': 'signature_timeout'
-                        }
-                    })
+                admin_users = User.find_all({'role': 'super_admin'}, projection={'_id': 1})
+                Notification.bulk_create([{
+                    'user_id': str(admin['_id']),
+                    'type': Notification.TYPE_ESCALATION,
+                    'title': 'Signature Request Expired',
+                    'message': f'Customer signature request expired for booking {booking_id}. Manual intervention required.',
+                    'data': {
+                        'booking_id': booking_id,
+                        'customer_name': customer.get('name', 'Unknown') if customer else 'Unknown',
+                        'vendor_name': vendor.get('name', 'Unknown') if vendor else 'Unknown',
+                        'service_name': booking.get('service_name', 'Service'),
+                        'expired_at': booking.get('signature_timeout_at'),
+                        'escalation_reason': 'signature_timeout'
+                    }
+                } for admin in admin_users])
                 
                 # Send real-time notification to admins
                 socketio.emit('signature_escalation', {
@@ -0,0 +1,227 @@
+"""
+Database helpers for HomeServe Pro.
+Small PyMongo utilities shared by the models.
+"""
+
+import logging
+import re
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from flask import g, has_request_context
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Decoding options for cached collection handles: plain dicts and naive UTC
+# datetimes, matching what the models store and compare against
+CODEC_OPTIONS = CodecOptions(document_class=dict, tz_aware=False)
+
+# Documents fetched per round trip by the models' streaming iter_* finders
+STREAM_BATCH_SIZE = 200
+
+
+def utcnow():
+    """
+    Return the current UTC time as a naive datetime.
+
+    Same value as the deprecated ``datetime.utcnow()``; naive to match
+    what CODEC_OPTIONS decodes stored dates into, so the two compare.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def cached_collection(model):
+    """
+    Return a model's collection handle, cached on the model class.
+
+    The handle is rebuilt only when the Mongo database object changes
+    (e.g. a new app is created in tests).
+
+    Args:
+        model: Model class with a ``COLLECTION`` name
+
+    Returns:
+        Collection: Handle using CODEC_OPTIONS
+    """
+    from app import mongo
+    db = mongo.db
+    cached = model.__dict__.get('_coll_cache')
+    if cached is None or cached[0] is not db:
+        cached = (db, db[model.COLLECTION].with_options(codec_options=CODEC_OPTIONS))
+        model._coll_cache = cached
+    return cached[1]
+
+
+def insert_many_unordered(collection, docs):
+    """
+    Insert documents in one unordered batch.
+
+    Documents that fail (e.g. duplicate keys) are skipped without
+    aborting the rest of the batch.
+
+    Args:
+        collection: PyMongo collection
+        docs (list): Documents to insert
+
+    Returns:
+        list: Inserted IDs as strings, in input order
+    """
+    if not docs:
+        return []
+    try:
+        collection.insert_many(docs, ordered=False)
+        failed = set()
+    except BulkWriteError as e:
+        failed = {err['index'] for err in e.details.get('writeErrors', [])}
+    return [str(doc['_id']) for i, doc in enumerate(docs) if i not in failed]
+
+
+# Server error code for transactions against a standalone mongod
+_ILLEGAL_OPERATION = 20
+
+
+def run_in_transaction(callback):
+    """
+    Run ``callback(session)`` inside a multi-document transaction.
+
+    The callback may be retried on transient errors, so it must not mutate
+    state shared across attempts. Standalone servers, which cannot run
+    transactions, fall back to ``callback(None)`` with plain writes.
+
+    Args:
+        callback: Function taking a ClientSession (or None)
+
+    Returns:
+        The callback's return value
+    """
+    from app import mongo
+    try:
+        with mongo.cx.start_session() as session:
+            return session.with_transaction(callback)
+    except OperationFailure as e:
+        if e.code != _ILLEGAL_OPERATION:
+            raise
+        return callback(None)
+
+
+def drop_indexes(collection, names):
+    """
+    Drop indexes by name, skipping any that do not exist.
+
+    Used by the models' create_indexes() to remove indexes that newer
+    ones have superseded, so their write cost goes away on upgrade.
+
+    Args:
+        collection: PyMongo collection
+        names (iterable): Index names, e.g. ``'signature_escalated_1'``
+    """
+    existing = collection.index_information()
+    for name in names:
+        if name in existing:
+            collection.drop_index(name)
+
+
+_OBJECT_ID_RE = re.compile(r'[0-9a-fA-F]{24}')
+
+
+def to_object_id(value):
+    """
+    Convert a value to an ObjectId without raising.
+
+    ObjectId instances pass through untouched; anything that is not a
+    24-character hex string is rejected before reaching the constructor.
+
+    Args:
+        value: ObjectId or hex string
+
+    Returns:
+        ObjectId: Converted ID, or None if the value is not a valid ID
+    """
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, str) and _OBJECT_ID_RE.fullmatch(value):
+        return ObjectId(value)
+    return None
+
+
+def find_docs_by_ids(collection, ids, projection=None):
+    """
+    Fetch several documents by ID with a single ``$in`` query.
+
+    Args:
+        collection: PyMongo collection
+        ids (iterable): ObjectIds or hex strings; invalid IDs are ignored
+        projection (dict): Fields to return
+
+    Returns:
+        dict: Found documents keyed by their string ID
+    """
+    oids = {oid for oid in map(to_object_id, ids) if oid is not None}
+    if not oids:
+        return {}
+    cursor = collection.find({'_id': {'$in': list(oids)}}, projection)
+    return {str(doc['_id']): doc for doc in cursor}
+
+
+def as_object_id(value):
+    """
+    Convert a string ID to ObjectId, passing everything else through.
+
+    Unlike to_object_id(), a malformed string raises, so write paths fail
+    loudly instead of matching nothing.
+
+    Args:
+        value: ObjectId, hex string, or any other value
+
+    Returns:
+        ObjectId for ObjectId and string input, otherwise ``value`` unchanged
+
+    Raises:
+        bson.errors.InvalidId: If ``value`` is a string that is not a valid ID
+    """
+    if type(value) is ObjectId:
+        return value
+    if isinstance(value, str):
+        return ObjectId(value)
+    return value
+
+
+def queue_write(collection, operation):
+    """
+    Queue a write to be sent with the request's other writes.
+
+    Queued operations are grouped per collection and flushed by
+    flush_writes() at request teardown, one unordered bulk_write per
+    collection. Outside a request the write is executed immediately.
+
+    Args:
+        collection: PyMongo collection
+        operation: InsertOne, UpdateOne, DeleteOne, ...
+    """
+    if not has_request_context():
+        collection.bulk_write([operation])
+        return
+    buffer = g.get('_write_buffer')
+    if buffer is None:
+        buffer = g._write_buffer = {}
+    buffer.setdefault(collection.full_name, (collection, []))[1].append(operation)
+
+
+def flush_writes(exception=None):
+    """
+    Send the writes queued during this request (teardown_request handler).
+
+    Failures are logged rather than raised, since the response has already
+    been produced.
+    """
+    buffer = g.pop('_write_buffer', None)
+    if not buffer:
+        return
+    for collection, operations in buffer.values():
+        try:
+            collection.bulk_write(operations, ordered=False)
+        except PyMongoError:
+            logger.exception('Failed to flush %d queued writes to %s',
+                             len(operations), collection.full_name)
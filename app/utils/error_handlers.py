@@ -40,8 +40,14 @@ def handle_404_error(error):
 
 
 def handle_500_error(error):
-    """Handle 500 Internal Server Error."""
+    """
+    Handle 500 Internal Server Error.
+
+    Also receives unhandled exceptions from views, which Flask logs and
+    wraps in InternalServerError; the exception text is not sent back.
+    """
     return jsonify({
+        'success': False,
         'error': 'Internal Server Error',
         'message': 'An unexpected error occurred. Please try again later.'
     }), 500
@@ -0,0 +1,64 @@
+"""
+JSON provider for HomeServe Pro.
+Parses request bodies and serializes API responses with orjson when it is
+installed.
+"""
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Drop-in replacement for Flask's default JSON provider.
+
+    Output matches the default provider (dates still go through Flask's
+    ``default`` hook, keys are still sorted); only the encoder changes.
+    Falls back to the stdlib encoder when orjson is not installed.
+    ObjectIds are written as their hex string, and numpy scalars and arrays
+    (from the AI services) are encoded natively.
+    """
+
+    @staticmethod
+    def default(o):
+        """Serialize types the encoder does not handle natively."""
+        if isinstance(o, ObjectId):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+    def _orjson_option(self, indent=False):
+        """Build the orjson option flags for this provider's settings."""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as a JSON string."""
+        if not ORJSON_AVAILABLE or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize data as JSON (request bodies via ``get_json``)."""
+        if not ORJSON_AVAILABLE or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize the given arguments as JSON and return a Response."""
+        if not ORJSON_AVAILABLE:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_option(indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,97 @@
+"""
+Pagination helpers for HomeServe Pro.
+Keyset (range) cursors for list endpoints sorted newest first.
+
+A cursor identifies the last document of a page by its sort timestamp and
+``_id`` (``<iso timestamp>_<object id>``), so documents sharing the same
+timestamp are neither skipped nor repeated across pages.
+"""
+
+from datetime import datetime
+from bson import ObjectId
+
+CURSOR_SEPARATOR = '_'
+
+
+def parse_cursor(value):
+    """
+    Parse a ``before`` cursor from the query string.
+
+    A bare ISO-8601 timestamp (the older cursor format) is still accepted.
+
+    Args:
+        value (str): Cursor returned as ``next_cursor``
+
+    Returns:
+        tuple: ``(timestamp, ObjectId or None)``, or None when not provided
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not value:
+        return None
+    timestamp, _, last_id = value.partition(CURSOR_SEPARATOR)
+    if last_id and not ObjectId.is_valid(last_id):
+        raise ValueError(f"Invalid cursor id: {last_id!r}")
+    return datetime.fromisoformat(timestamp), ObjectId(last_id) if last_id else None
+
+
+def next_cursor(docs, limit, field='created_at'):
+    """
+    Build the cursor for the page after ``docs``.
+
+    Args:
+        docs (list): Documents of the current page, newest first
+        limit (int): Page size that was requested
+        field (str): Sort field the cursor is based on
+
+    Returns:
+        str: Cursor for the next page, or None when this is the last page
+    """
+    if not docs or len(docs) < limit:
+        return None
+    last = docs[-1]
+    value = last.get(field)
+    if not value:
+        return None
+    return f"{value.isoformat()}{CURSOR_SEPARATOR}{last['_id']}"
+
+
+def keyset_sort(field='created_at'):
+    """Return the newest-first sort matching cursors built on ``field``."""
+    return [(field, -1), ('_id', -1)]
+
+
+def apply_cursor(query, before, field='created_at'):
+    """
+    Restrict a query to documents that sort after the cursor.
+
+    Args:
+        query (dict): Mongo filter, modified in place
+        before (tuple|datetime): Parsed cursor; a bare datetime compares on
+            ``field`` only
+        field (str): Sort field the cursor is based on
+
+    Returns:
+        dict: The same query
+    """
+    if not before:
+        return query
+    if isinstance(before, datetime):
+        timestamp, last_id = before, None
+    else:
+        timestamp, last_id = before
+
+    if last_id is None:
+        condition = {field: {'$lt': timestamp}}
+    else:
+        condition = {'$or': [
+            {field: {'$lt': timestamp}},
+            {field: timestamp, '_id': {'$lt': last_id}}
+        ]}
+
+    if field in query or '$or' in query:
+        query.setdefault('$and', []).append(condition)
+    else:
+        query.update(condition)
+    return query
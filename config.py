@@ -22,11 +22,24 @@ class Config:
     # MongoDB Configuration
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/homeservepro')
     MONGO_DBNAME = os.getenv('MONGO_DBNAME', 'homeservepro')
+    # Per-worker connection pool; PyMongo's default of 100 is far more than
+    # one threaded worker needs
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 10))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 2))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 30000))
+    # Fail fast when every pooled connection is busy instead of queueing forever
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2500))
     
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 1)))
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 30)))
+    # Signing algorithm. Asymmetric ones (e.g. EdDSA) read a PEM key pair from
+    # these paths instead of using JWT_SECRET_KEY; switching invalidates
+    # tokens issued under the previous algorithm
+    JWT_ALGORITHM = os.getenv('JWT_ALGORITHM', 'HS256')
+    JWT_PRIVATE_KEY_PATH = os.getenv('JWT_PRIVATE_KEY_PATH', '')
+    JWT_PUBLIC_KEY_PATH = os.getenv('JWT_PUBLIC_KEY_PATH', '')
     JWT_TOKEN_LOCATION = ['headers', 'cookies']
     JWT_COOKIE_SECURE = False  # Set to True in production with HTTPS
     JWT_COOKIE_CSRF_PROTECT = True
@@ -55,7 +68,9 @@ class Config:
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'gif'}
     
     # Security Settings
-    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    # bcrypt cost factor; each step doubles hashing time on signup and login.
+    # Stored hashes are rehashed to this cost on the user's next login
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 10))
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
     
     # Rate Limiting
@@ -64,7 +79,10 @@ class Config:
     
     # SocketIO Configuration
     SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', None)
-    SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'eventlet')
+    SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'threading')
+
+    # Skip blueprints, CORS and SocketIO when the app only runs CLI commands
+    CLI_MINIMAL = os.getenv('HOMESERVE_CLI_MINIMAL', '0') == '1'
     
     # AI/ML Configuration
     AI_MODEL_PATH = os.getenv('AI_MODEL_PATH', './models')
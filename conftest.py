@@ -0,0 +1,30 @@
+"""
+Shared pytest fixtures for HomeServe Pro.
+The app runs against an in-memory mongomock database, so no server is needed.
+"""
+
+import pytest
+
+from app import create_app, get_mongo
+from config import TestingConfig
+
+
+@pytest.fixture
+def app():
+    """App on a fresh in-memory database, with an app context pushed."""
+    mongomock = pytest.importorskip('mongomock')
+
+    app = create_app(TestingConfig)
+    client = mongomock.MongoClient()
+    mongo = get_mongo()
+    mongo.cx = client
+    mongo.db = client[TestingConfig.MONGO_DBNAME]
+
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    """Test client for the app fixture."""
+    return app.test_client()
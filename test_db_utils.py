@@ -0,0 +1,55 @@
+"""
+Tests for the shared database helpers in app.utils.db.
+"""
+
+from pymongo import ASCENDING, InsertOne, UpdateOne
+
+from app.utils.db import drop_indexes, flush_writes, queue_write
+
+
+def _collection(name):
+    """Return a collection on the test database."""
+    from app import mongo
+    return mongo.db[name]
+
+
+def test_flush_writes_without_queued_writes(app):
+    with app.test_request_context():
+        flush_writes()
+
+
+def test_flush_writes_sends_queued_writes(app):
+    coll = _collection('queued')
+    other = _collection('queued_other')
+    coll.insert_one({'_id': 1, 'n': 1})
+
+    with app.test_request_context():
+        queue_write(coll, InsertOne({'_id': 2}))
+        queue_write(coll, UpdateOne({'_id': 1}, {'$inc': {'n': 1}}))
+        queue_write(other, InsertOne({'_id': 3}))
+        assert coll.count_documents({}) == 1
+
+        flush_writes()
+
+        assert coll.find_one({'_id': 1}) == {'_id': 1, 'n': 2}
+        assert coll.count_documents({}) == 2
+        assert other.count_documents({}) == 1
+
+        # The queue is emptied, so a second flush sends nothing
+        flush_writes()
+        assert other.count_documents({}) == 1
+
+
+
+def test_drop_indexes_skips_missing_names(app):
+    coll = _collection('indexed')
+    coll.create_index([('a', ASCENDING)])
+    coll.create_index([('b', ASCENDING)])
+
+    drop_indexes(coll, ['a_1', 'missing_1'])
+
+    assert sorted(coll.index_information()) == ['_id_', 'b_1']
+
+
+def test_drop_indexes_on_missing_collection(app):
+    drop_indexes(_collection('not_created'), ['a_1'])
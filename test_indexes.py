@@ -0,0 +1,59 @@
+"""
+Tests for the index migrations run by the models' create_indexes().
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.models.booking import Booking
+from app.models.payment import Payment
+from app.models.user import User
+
+
+def _single_field_indexes(*fields):
+    return [IndexModel([(field, ASCENDING)]) for field in fields]
+
+
+def test_booking_indexes_drop_superseded_single_field_indexes(app):
+    coll = Booking._coll()
+    coll.create_indexes(_single_field_indexes(
+        'customer_id', 'vendor_id', 'status', 'signature_status',
+        'signature_timeout_at', 'signature_escalated'
+    ) + [IndexModel([('status', ASCENDING), ('created_at', DESCENDING)])])
+
+    Booking.create_indexes()
+    # A second run finds nothing left to migrate
+    Booking.create_indexes()
+
+    names = set(coll.index_information())
+    assert not names & {
+        'customer_id_1', 'vendor_id_1', 'status_1', 'signature_status_1',
+        'signature_timeout_at_1', 'signature_escalated_1', 'status_1_created_at_-1'
+    }
+    assert {'status_1_created_at_-1__id_-1', 'pending_signature_timeout'} <= names
+
+
+def test_payment_indexes_drop_vendor_prefix_indexes(app):
+    coll = Payment._coll()
+    coll.create_indexes(_single_field_indexes('vendor_id', 'payment_type') + [
+        IndexModel([('vendor_id', ASCENDING), ('status', ASCENDING)])
+    ])
+
+    Payment.create_indexes()
+
+    names = set(coll.index_information())
+    assert not names & {'vendor_id_1', 'payment_type_1', 'vendor_id_1_status_1'}
+    assert 'vendor_id_1_status_1_payment_type_1_amount_1' in names
+
+
+def test_user_indexes_drop_email_role_index(app):
+    coll = User._coll()
+    coll.create_indexes([
+        IndexModel([('email', ASCENDING)], unique=True),
+        IndexModel([('email', ASCENDING), ('role', ASCENDING)])
+    ])
+
+    User.create_indexes()
+
+    names = set(coll.index_information())
+    assert 'email_1_role_1' not in names
+    assert 'email_1' in names
@@ -0,0 +1,120 @@
+"""
+Tests for keyset pagination (app.utils.pagination) and Booking.find_page.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.booking import Booking
+from app.utils.pagination import apply_cursor, next_cursor, parse_cursor
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def test_parse_cursor_round_trips_next_cursor():
+    last = {'_id': ObjectId(), 'created_at': T0}
+    cursor = next_cursor([last], limit=1)
+
+    assert parse_cursor(cursor) == (T0, last['_id'])
+
+
+def test_parse_cursor_accepts_bare_timestamp():
+    assert parse_cursor(T0.isoformat()) == (T0, None)
+
+
+def test_parse_cursor_empty():
+    assert parse_cursor(None) is None
+    assert parse_cursor('') is None
+
+
+@pytest.mark.parametrize('value', [
+    'not-a-date',
+    f'{T0.isoformat()}_not-an-id',
+    f'{T0.isoformat()}_{"a" * 23}',
+])
+def test_parse_cursor_rejects_malformed_input(value):
+    with pytest.raises(ValueError):
+        parse_cursor(value)
+
+
+def test_next_cursor_is_none_on_a_short_page():
+    docs = [{'_id': ObjectId(), 'created_at': T0}]
+    assert next_cursor(docs, limit=2) is None
+    assert next_cursor([], limit=2) is None
+
+
+def test_apply_cursor_breaks_timestamp_ties_on_id():
+    last_id = ObjectId()
+    query = apply_cursor({'status': 'pending'}, (T0, last_id))
+
+    assert query == {
+        'status': 'pending',
+        '$or': [
+            {'created_at': {'$lt': T0}},
+            {'created_at': T0, '_id': {'$lt': last_id}},
+        ]
+    }
+
+
+def test_apply_cursor_keeps_an_existing_or():
+    query = apply_cursor({'$or': [{'a': 1}, {'b': 1}]}, (T0, ObjectId()))
+
+    assert query['$or'] == [{'a': 1}, {'b': 1}]
+    assert len(query['$and']) == 1
+
+
+def test_apply_cursor_without_id_compares_timestamp_only():
+    assert apply_cursor({}, T0) == {'created_at': {'$lt': T0}}
+    assert apply_cursor({}, None) == {}
+
+
+def _insert_bookings(count, status='pending', same_time=False):
+    return [
+        Booking._coll().insert_one({
+            'status': status,
+            'created_at': T0 if same_time else T0 + timedelta(minutes=i)
+        }).inserted_id
+        for i in range(count)
+    ]
+
+
+def test_keyset_pages_do_not_skip_or_repeat_tied_timestamps(app):
+    ids = _insert_bookings(5, same_time=True)
+
+    seen, before = [], None
+    while True:
+        page = Booking.find_by_status('pending', limit=2, before=before)
+        seen.extend(doc['_id'] for doc in page)
+        cursor = next_cursor(page, 2)
+        if cursor is None:
+            break
+        before = parse_cursor(cursor)
+
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_find_page_returns_page_and_total(app):
+    ids = _insert_bookings(5)
+    _insert_bookings(2, status='cancelled')
+
+    page, total = Booking.find_page({'status': 'pending'}, skip=1, limit=2)
+
+    assert total == 5
+    assert [doc['_id'] for doc in page] == [ids[3], ids[2]]
+
+
+def test_find_page_with_cursor_counts_every_match(app):
+    ids = _insert_bookings(5)
+
+    first, _ = Booking.find_page({'status': 'pending'}, limit=2)
+    before = parse_cursor(next_cursor(first, 2))
+    page, total = Booking.find_page({'status': 'pending'}, limit=2, before=before)
+
+    assert total == 5
+    assert [doc['_id'] for doc in page] == [ids[2], ids[1]]
+
+
+def test_find_page_with_no_matches(app):
+    assert Booking.find_page({'status': 'pending'}) == ([], 0)
@@ -0,0 +1,68 @@
+"""
+Tests for the vendor payout request flow.
+"""
+
+from flask_jwt_extended import create_access_token
+
+from app.models.notification import Notification
+from app.models.payment import Payment
+from app.models.user import User
+from app.models.vendor import Vendor
+
+
+def _vendor_with_balance(amount):
+    """Create an approved vendor with bank details and one completed payment."""
+    user_id = User._coll().insert_one({
+        'email': 'payout-vendor@test.com',
+        'name': 'Payout Vendor',
+        'role': User.ROLE_VENDOR,
+        'active': True
+    }).inserted_id
+    vendor_id = Vendor._coll().insert_one({
+        'user_id': user_id,
+        'name': 'Payout Vendor',
+        'bank_details': {'account_number': '1234567890', 'ifsc_code': 'TEST0001'}
+    }).inserted_id
+    Payment.create({'vendor_id': vendor_id, 'amount': amount, 'status': Payment.STATUS_COMPLETED})
+    return user_id, vendor_id
+
+
+def test_request_payout_notifies_every_super_admin(client):
+    admin_ids = [
+        User._coll().insert_one({'email': f'admin{i}@test.com', 'role': User.ROLE_SUPER_ADMIN}).inserted_id
+        for i in range(2)
+    ]
+    user_id, vendor_id = _vendor_with_balance(500)
+    token = create_access_token(identity=str(user_id))
+
+    response = client.post(
+        '/api/vendor/payouts/request',
+        json={'amount': 200, 'method': 'bank_transfer'},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == 200
+    payout_id = response.get_json()['data']['payout_id']
+    payout = Payment.find_by_id(payout_id)
+    assert payout['vendor_id'] == vendor_id
+    assert payout['amount'] == 200
+
+    # Queued notifications are flushed at request teardown
+    notifications = list(Notification._coll().find({'type': Notification.TYPE_PAYOUT_REQUESTED}))
+    assert sorted(n['user_id'] for n in notifications) == sorted(admin_ids)
+    assert all(n['data']['payout_id'] == payout_id for n in notifications)
+
+
+def test_request_payout_rejects_amount_above_balance(client):
+    user_id, vendor_id = _vendor_with_balance(100)
+    token = create_access_token(identity=str(user_id))
+
+    response = client.post(
+        '/api/vendor/payouts/request',
+        json={'amount': 150},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == 400
+    assert Payment.count({'vendor_id': vendor_id}) == 1
+    assert Notification._coll().count_documents({}) == 0